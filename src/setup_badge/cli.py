@@ -4,16 +4,29 @@
 Purpose: Generate an endpoint badge to showcase on README
 """
 
+import base64
+import functools
+import hashlib
 import json
 import os
+import shutil
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
 from pathlib import Path
+from typing import Callable, TextIO
 
 import click
 import git
 import validators
+from click.core import ParameterSource
 
 from setup_badge import __version__
 
+AVAILABLE_BADGE_STYLES = ["flat", "flat-square", "plastic", "for-the-badge", "social"]
+AVAILABLE_PUBLISHERS = ["git", "contents-api", "filesystem"]
+
 
 def get_repo():
     """
@@ -147,18 +160,44 @@ def create_badge_dict(badge_style: str, label: str, label_color: str, message: s
     return badge_dict
 
 
-def create_badge_json(badge_dict: dict, badge_name: str) -> bool:
+def get_badge_path(badge_name: str, badge_layout: str = "flat") -> str:
     """
-    Create badge json files from python dictionary
+    Get badge json file path relative to the repository root
+
+    Parameter(s):
+    badge_name  : badge filename (e.g. badge)
+    badge_layout: badge folder layout (flat: badges/<name>.json, sharded: badges/<hash-prefix>/<name>.json)
+    """
+    if badge_layout == "sharded":
+        shard = hashlib.sha256(badge_name.encode("utf-8")).hexdigest()[:2]
+        return f"badges/{shard}/{badge_name}.json"
+    else:
+        return f"badges/{badge_name}.json"
+
+
+def get_badge_index_path(badge_name: str) -> str:
+    """
+    Get the shard index path of a badge in the sharded layout (badges/<hash-prefix>/index.json)
 
     Parameter(s):
-    badge_dict: a python dictionary in shields.io endpoint badge schema
     badge_name: badge filename (e.g. badge)
     """
-    badge_file_dst = f"badges/{badge_name}.json"
+    return f"{get_badge_path(badge_name, 'sharded').rsplit('/', 1)[0]}/index.json"
+
+
+def create_badge_json(badge_dict: dict, badge_name: str, badge_layout: str = "flat") -> bool:
+    """
+    Create badge json files from python dictionary
+
+    Parameter(s):
+    badge_dict  : a python dictionary in shields.io endpoint badge schema
+    badge_name  : badge filename (e.g. badge)
+    badge_layout: badge folder layout (flat or sharded)
+    """
+    badge_file_dst = get_badge_path(badge_name, badge_layout)
 
     if isinstance(badge_dict, dict):
-        badge_path = Path("badges")
+        badge_path = Path(badge_file_dst).parent
         badge_path.mkdir(parents=True, exist_ok=True)
 
         with open(badge_file_dst, "w") as json_file:
@@ -170,66 +209,269 @@ def create_badge_json(badge_dict: dict, badge_name: str) -> bool:
         return False
 
 
-def check_badge_changes(repo: git.Repo, badge_name: str) -> bool:
+def get_badge_index_entry(badge_dict: dict, badge_name: str, badge_layout: str = "flat") -> dict:
     """
-    Check any badge changes
+    Get badge entry for the shard index (badges/<hash-prefix>/index.json)
 
     Parameter(s):
-    repo      : repo class object 'git.repo.base.Repo'
-    badge_name: badge filename (e.g. badge)
+    badge_dict  : a python dictionary in shields.io endpoint badge schema
+    badge_name  : badge filename (e.g. badge)
+    badge_layout: badge folder layout (flat or sharded)
     """
-    if any(
-        [
-            f"badges/{badge_name}.json" in repo.untracked_files,
-            len(repo.git.diff("HEAD", f"badges/{badge_name}.json")) > 0,
-        ]
-    ):
-        return True
-    else:
+    return {"path": get_badge_path(badge_name, badge_layout), "message": badge_dict.get("message")}
+
+
+def dump_badge_index(badge_index: dict) -> str:
+    """
+    Serialize a shard index with one badge entry per line
+
+    One entry per line keeps index diffs small. Concurrent updates of one shard can still
+    conflict, and push_changes resolves them by rebuilding the index from its shard folder.
+
+    Parameter(s):
+    badge_index: a python dictionary of badge name to badge entry
+    """
+    if not badge_index:
+        return "{}\n"
+    lines = [
+        f"{json.dumps(badge_name)}:{json.dumps(entry, separators=(',', ':'), sort_keys=True)}"
+        for badge_name, entry in sorted(badge_index.items())
+    ]
+    return "{\n" + ",\n".join(lines) + "\n}\n"
+
+
+def rebuild_badge_index(shard_path: Path) -> dict:
+    """
+    Rebuild a shard index from the badge json files in its shard folder
+
+    Parameter(s):
+    shard_path: shard folder (e.g. badges/3f)
+    """
+    badge_index = {}
+    for badge_file in sorted(shard_path.glob("*.json")):
+        if badge_file.name == "index.json":
+            continue
+        try:
+            with open(badge_file, "r") as json_file:
+                badge_index[badge_file.stem] = get_badge_index_entry(json.load(json_file), badge_file.stem, "sharded")
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"❌ skipped {badge_file} in index: {e}")
+
+    return badge_index
+
+
+def update_badge_index(badge_dict: dict, badge_name: str, badge_layout: str = "flat", root: str = ".") -> bool:
+    """
+    Add/update badge entry in its shard index (badges/<hash-prefix>/index.json)
+
+    The shard index maps badge name to its json file path and message, so listing badges
+    reads one small file per shard, and an update only rewrites the index of its own shard.
+
+    Parameter(s):
+    badge_dict  : a python dictionary in shields.io endpoint badge schema
+    badge_name  : badge filename (e.g. badge)
+    badge_layout: badge folder layout (sharded)
+    root        : folder that holds the badges folder
+    """
+    if not isinstance(badge_dict, dict) or badge_layout != "sharded":
         return False
 
+    index_file_dst = Path(root) / get_badge_index_path(badge_name)
+    try:
+        with open(index_file_dst, "r") as json_file:
+            badge_index = json.load(json_file)
+        if not isinstance(badge_index, dict):
+            raise ValueError("index is not a JSON object")
+    except FileNotFoundError:
+        badge_index = {}
+    except ValueError:
+        print(f"❌ {index_file_dst} is not a valid index, rebuilding it from its shard folder")
+        badge_index = rebuild_badge_index(index_file_dst.parent)
 
-def push_changes(repo: git.Repo, remote_name: str, badge_branch: str, badge_name: str, msg_suffix: str) -> str | None:
+    badge_index[badge_name] = get_badge_index_entry(badge_dict, badge_name, badge_layout)
+
+    index_file_dst.parent.mkdir(parents=True, exist_ok=True)
+    with open(index_file_dst, "w") as json_file:
+        json_file.write(dump_badge_index(badge_index))
+
+    return True
+
+
+def read_badge_index(root: str = ".") -> dict:
+    """
+    Read every shard index into one badge index (badge name to path and message)
+
+    Parameter(s):
+    root: folder that holds the badges folder
+    """
+    badge_index = {}
+    for index_file in sorted(Path(root).glob("badges/*/index.json")):
+        try:
+            with open(index_file, "r") as json_file:
+                shard_index = json.load(json_file)
+            if not isinstance(shard_index, dict):
+                raise ValueError("index is not a JSON object")
+            badge_index.update(shard_index)
+        except (OSError, ValueError) as e:
+            print(f"❌ skipped {index_file}: {e}")
+
+    return badge_index
+
+
+def get_changed_files(repo: git.Repo, badge_files: list) -> list:
+    """
+    Get the files that are untracked or differ from HEAD
+
+    Parameter(s):
+    repo       : repo class object 'git.repo.base.Repo'
+    badge_files: a list of file paths relative to the repository root
+    """
+    changed = set(repo.git.diff("HEAD", "--name-only", "--", *badge_files).splitlines())
+    return [badge_file for badge_file in badge_files if badge_file in changed or badge_file in repo.untracked_files]
+
+
+def check_badge_changes(repo: git.Repo, badge_name: str, badge_layout: str = "flat") -> bool:
+    """
+    Check any badge changes (badge json file only, shard indexes are checked by the caller)
+
+    Parameter(s):
+    repo        : repo class object 'git.repo.base.Repo'
+    badge_name  : badge filename (e.g. badge)
+    badge_layout: badge folder layout (flat or sharded)
+    """
+    return len(get_changed_files(repo, [get_badge_path(badge_name, badge_layout)])) > 0
+
+
+def push_changes(
+    repo: git.Repo,
+    remote_name: str,
+    badge_branch: str,
+    badge_name: str | list[str],
+    msg_suffix: str,
+    badge_layout: str = "flat",
+    max_retries: int = 0,
+    push_stats: dict | None = None,
+) -> str | None:
     """
     Stage and write commits, and push to remote
 
+    A rejected push (e.g. a concurrent publisher pushed first) is retried up to max_retries times
+    after a pull (merge) from the remote badge branch.
+
     Parameter(s):
     repo        : repo class object 'git.repo.base.Repo'
     remote_name : remote name (e.g. origin)
     badge_branch: badge branch name (e.g. badges)
-    badge_name  : badge filename (e.g. badge)
+    badge_name  : badge filename (e.g. badge), or a list of badge filenames to push in one commit
     msg_suffix  : suffix to append to commit message
+    badge_layout: badge folder layout (flat or sharded)
+    max_retries : number of pull and push retries after a rejected push
+    push_stats  : optional python dictionary to count push_attempts and rejections
     """
+    push_stats = push_stats if push_stats is not None else {}
     try:
-        repo.index.add([f"badges/{badge_name}.json"])
+        badge_names = [badge_name] if isinstance(badge_name, str) else badge_name
+        badge_files = [get_badge_path(name, badge_layout) for name in badge_names]
+        if badge_layout == "sharded":
+            badge_files.extend(sorted({get_badge_index_path(name) for name in badge_names}))
+        repo.index.add(badge_files)
         repo.index.write()
         message = f"add/update to branch ({badge_branch}) {msg_suffix}"
         commit = repo.index.commit(message)
         commit_hash = f"{commit.hexsha}"
-        repo.git.push("--set-upstream", remote_name, badge_branch)
 
-        return commit_hash
+        for attempt in range(max_retries + 1):
+            push_stats["push_attempts"] = push_stats.get("push_attempts", 0) + 1
+            try:
+                repo.git.push("--set-upstream", remote_name, badge_branch)
+                return commit_hash
+            except git.GitCommandError:
+                push_stats["rejections"] = push_stats.get("rejections", 0) + 1
+                if attempt == max_retries:
+                    raise
+            try:
+                repo.git.pull("--no-rebase", remote_name, badge_branch)
+            except git.GitCommandError:
+                if resolve_badge_index_conflicts(repo):
+                    print(f"✅ resolved shard index conflicts from {remote_name}/{badge_branch}")
+                else:
+                    if (Path(repo.git_dir) / "MERGE_HEAD").exists():
+                        repo.git.merge("--abort")
+                    raise
+            commit_hash = f"{repo.head.commit.hexsha}"
+
+        return None  # pragma: no cover
 
     except Exception as e:
         print(f"❌ {e}")
         return None
 
 
-def create_shieldsio_endpoint_badge(repo: git.Repo, badge_branch: str, badge_name: str, badge_url: str) -> str:
+def resolve_badge_index_conflicts(repo: git.Repo) -> bool:
+    """
+    Resolve a merge that only conflicts in shard indexes (badges/<hash-prefix>/index.json)
+
+    Badge files of different badges never conflict, so every conflicting shard index is
+    rebuilt from the merged badge files in its shard folder and the merge is committed.
+
+    Parameter(s):
+    repo: repo class object 'git.repo.base.Repo'
+
+    Return: True if the merge is committed, False if there is no conflict or a badge file conflicts
+    """
+    conflicts = repo.git.diff("--name-only", "--diff-filter=U").splitlines()
+    if not conflicts or not all(
+        len(parts) == 3 and parts[0] == "badges" and parts[2] == "index.json"
+        for parts in [conflict.split("/") for conflict in conflicts]
+    ):
+        return False
+
+    for index_file in conflicts:
+        index_path = Path(repo.working_dir) / index_file
+        index_path.write_text(dump_badge_index(rebuild_badge_index(index_path.parent)))
+    repo.git.add("--", *conflicts)
+    repo.git.commit("--no-edit")
+
+    return True
+
+
+def get_owner_repo(repo: git.Repo) -> str:
+    """
+    Get owner/repo from the origin remote url
+
+    Parameter(s):
+    repo: repo class object 'git.repo.base.Repo'
+    """
+    repo_remotes_url = repo.remotes.origin.url
+    return "/".join(repo_remotes_url.rsplit("/", 2)[-2:]).replace(".git", "").replace("git@github.com:", "")
+
+
+def create_shieldsio_endpoint_badge(
+    repo: git.Repo | None,
+    badge_branch: str,
+    badge_name: str,
+    badge_url: str,
+    badge_layout: str = "flat",
+    json_base_url: str = "",
+) -> str:
     """
     Create Shields.io Endpoint Badge
 
     Parameter(s):
-    repo        : repo class object 'git.repo.base.Repo'
-    badge_name  : badge filename (e.g. badge)
-    badge_branch: badge branch name (e.g. badges)
-    badge_url   : badge clickable url
+    repo         : repo class object 'git.repo.base.Repo' (not used when json_base_url is set)
+    badge_name   : badge filename (e.g. badge)
+    badge_branch : badge branch name (e.g. badges)
+    badge_url    : badge clickable url
+    badge_layout : badge folder layout (flat or sharded)
+    json_base_url: base url that serves the badges folder (default: raw.githubusercontent.com of the badge branch)
     """
     shields_io = "https://img.shields.io/endpoint"
     raw_github = "https://raw.githubusercontent.com"
-    repo_remotes_url = repo.remotes.origin.url
-    owner_repo = "/".join(repo_remotes_url.rsplit("/", 2)[-2:]).replace(".git", "").replace("git@github.com:", "")
-    json_endpoint = f"{raw_github}/{owner_repo}/refs/heads/{badge_branch}/badges/{badge_name}.json"
+    if not json_base_url:
+        if repo is None:
+            raise ValueError("a repo or a json base url is required")
+        json_base_url = f"{raw_github}/{get_owner_repo(repo)}/refs/heads/{badge_branch}"
+    json_endpoint = f"{json_base_url.rstrip('/')}/{get_badge_path(badge_name, badge_layout)}"
     if badge_url:
         eb = f"[![{badge_name}]({shields_io}?url={json_endpoint})]({badge_url})"
     else:
@@ -257,22 +499,868 @@ def cicleanup(repo: git.Repo, remote_name: str, badge_branch: str) -> bool:
         return False
 
 
-@click.command()
-@click.option("--badge-name", default="badge", help="default: badge")
-@click.option("--badge-branch", default="badges", help="default: badges")
-@click.option("--badge-url", default="", help="default: ''")
-@click.option("--badge-style", default="flat", help="default: flat (flat, flat-square, plastic, for-the-badge, social)")
-@click.option("--label", default="demo", help="default: demo (badge left side text)")
-@click.option("--label-color", default="2e2e2e", help="default: 2e2e2e (badge left side hex color)")
-@click.option("--message", default="no status", help="default: no status (badge right side text)")
-@click.option("--message-color", default="2986CC", help="default: 2986CC (badge right side hex color)")
-@click.option("--remote-name", default="origin", help="default: origin")
-@click.option("--gitconfig-name", default="Mona Lisa", help="default: Mona Lisa")
-@click.option("--gitconfig-email", default="mona.lisa@github.com", help="default: mona.lisa@github.com")
+def lock_object_cache(lock_file: str, exclusive: bool) -> TextIO:
+    """
+    Lock a file in the shared object cache (POSIX advisory lock), waiting for the lock
+
+    Parameter(s):
+    lock_file: lock file path
+    exclusive: exclusive lock if True, shared lock if False
+
+    Return: open lock file (keep it open to hold the lock)
+    """
+    import fcntl  # POSIX only, imported here so the default publish path runs everywhere
+
+    lock = open(lock_file, "a+")
+    fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+    return lock
+
+
+def try_lock_object_cache(lock_file: str) -> TextIO | None:
+    """
+    Lock a file in the shared object cache (POSIX advisory lock, exclusive) without waiting
+
+    Parameter(s):
+    lock_file: lock file path
+
+    Return: open lock file (keep it open to hold the lock), or None if the lock is held elsewhere
+    """
+    import fcntl  # POSIX only, imported here so the default publish path runs everywhere
+
+    lock = open(lock_file, "a+")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return lock
+    except BlockingIOError:
+        lock.close()
+        return None
+
+
+def get_object_cache_mirror(object_cache: str, remote_url: str) -> str:
+    """
+    Get the bare mirror path of a remote in the shared object cache
+
+    Parameter(s):
+    object_cache: shared object cache folder (e.g. ~/.cache/setup-badge)
+    remote_url  : remote url (hashed, so credentials in the url never reach the folder name)
+    """
+    remote_key = hashlib.sha256(remote_url.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.abspath(os.path.expanduser(object_cache)), f"{remote_key}.git")
+
+
+def attach_object_cache(repo: git.Repo, remote_name: str, object_cache: str) -> TextIO | None:
+    """
+    Attach the bare mirror of a remote to the repo as a git alternate, so fetches only transfer new objects
+
+    The mirror is created under <mirror>.lock (exclusive), and <mirror>.use (shared) is held
+    until close_object_cache so prune_object_cache never removes a mirror in use.
+
+    Parameter(s):
+    repo        : repo class object 'git.repo.base.Repo'
+    remote_name : remote name (e.g. origin)
+    object_cache: shared object cache folder (e.g. ~/.cache/setup-badge)
+
+    Return: open use lock file, or None if the object cache is not attached
+    """
+    try:
+        mirror = get_object_cache_mirror(object_cache, repo.remote(remote_name).url)
+        Path(mirror).parent.mkdir(parents=True, exist_ok=True)
+
+        write_lock = lock_object_cache(f"{mirror}.lock", exclusive=True)
+        try:
+            use_lock = lock_object_cache(f"{mirror}.use", exclusive=False)
+            if not os.path.isdir(mirror):
+                git.Repo.init(mirror, bare=True)
+        finally:
+            write_lock.close()
+
+        alternates = Path(repo.git_dir) / "objects" / "info" / "alternates"
+        mirror_objects = os.path.join(mirror, "objects")
+        current = alternates.read_text().splitlines() if alternates.is_file() else []
+        if mirror_objects not in current:
+            alternates.parent.mkdir(parents=True, exist_ok=True)
+            alternates.write_text("\n".join(current + [mirror_objects]) + "\n")
+
+        os.utime(mirror)
+        return use_lock
+
+    except Exception as e:
+        print(f"❌ {e}")
+        return None
+
+
+def close_object_cache(
+    repo: git.Repo, remote_name: str, object_cache: str, object_cache_size: int, use_lock: TextIO
+) -> bool:
+    """
+    Refresh the bare mirror from the repo, detach it from the repo, release it, and prune the shared object cache
+
+    The mirror fetches from the local repo (not the remote), so the cache never needs credentials.
+    The repo is always detached from the mirror (dissociate_object_cache) before the mirror is released,
+    even when the refresh fails, so a pruned mirror never breaks it.
+
+    Parameter(s):
+    repo             : repo class object 'git.repo.base.Repo'
+    remote_name      : remote name (e.g. origin)
+    object_cache     : shared object cache folder (e.g. ~/.cache/setup-badge)
+    object_cache_size: maximum object cache size in MB
+    use_lock         : open use lock file from attach_object_cache
+
+    Return: True if the mirror is refreshed
+    """
+    refreshed = False
+    try:
+        mirror = get_object_cache_mirror(object_cache, repo.remote(remote_name).url)
+        write_lock = lock_object_cache(f"{mirror}.lock", exclusive=True)
+        try:
+            git.Repo(mirror).git.fetch("--prune", repo.git_dir, f"+refs/remotes/{remote_name}/*:refs/heads/*")
+            os.utime(mirror)
+        finally:
+            write_lock.close()
+        refreshed = True
+    except Exception as e:
+        print(f"❌ {e}")
+
+    try:
+        dissociate_object_cache(repo, object_cache)
+    except Exception as e:
+        # the repo still borrows objects from the mirror, so leave the cache unpruned
+        print(f"❌ {e}")
+        return False
+    finally:
+        use_lock.close()
+
+    prune_object_cache(object_cache, object_cache_size)
+    return refreshed
+
+
+def dissociate_object_cache(repo: git.Repo, object_cache: str) -> bool:
+    """
+    Copy the objects the repo borrows from the shared object cache into its own pack and drop its alternates
+
+    Same as git clone --dissociate, so the repo keeps working after its mirror is removed.
+
+    Parameter(s):
+    repo        : repo class object 'git.repo.base.Repo'
+    object_cache: shared object cache folder (e.g. ~/.cache/setup-badge)
+
+    Return: True if the repo is dissociated, False if it does not use the object cache
+    """
+    alternates = Path(repo.git_dir) / "objects" / "info" / "alternates"
+    cache_path = os.path.abspath(os.path.expanduser(object_cache))
+    current = alternates.read_text().splitlines() if alternates.is_file() else []
+    kept = [line for line in current if not line.startswith(cache_path + os.sep)]
+    if kept == current:
+        return False
+
+    repo.git.repack("-a", "-d", "-q")
+    if kept:
+        alternates.write_text("\n".join(kept) + "\n")
+    else:
+        alternates.unlink()
+
+    return True
+
+
+def get_object_cache_size(path: Path) -> int:
+    """
+    Get the size of a mirror in bytes (files removed by a concurrent job are skipped)
+
+    Parameter(s):
+    path: mirror folder
+    """
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.stat(os.path.join(root, file), follow_symlinks=False).st_size
+            except FileNotFoundError:
+                continue
+
+    return size
+
+
+def prune_object_cache(object_cache: str, object_cache_size: int) -> list:
+    """
+    Remove least recently used mirrors until the shared object cache fits its size limit
+
+    Mirrors that are being updated or used by another job are skipped, and a mirror is only
+    measured and removed while holding both of its locks.
+
+    Parameter(s):
+    object_cache     : shared object cache folder (e.g. ~/.cache/setup-badge)
+    object_cache_size: maximum object cache size in MB
+
+    Return: a list of removed mirrors
+    """
+    cache_path = Path(object_cache).expanduser()
+    mirrors = {}
+    for mirror in cache_path.glob("*.git") if cache_path.is_dir() else []:
+        try:
+            mirrors[mirror] = mirror.stat().st_mtime
+        except FileNotFoundError:
+            continue
+    total_size = sum(get_object_cache_size(mirror) for mirror in mirrors)
+
+    removed = []
+    for mirror in sorted(mirrors, key=lambda mirror: mirrors[mirror]):
+        if total_size <= object_cache_size * 1024 * 1024:
+            break
+
+        write_lock = try_lock_object_cache(f"{mirror}.lock")
+        if write_lock is None:
+            continue
+        try:
+            use_lock = try_lock_object_cache(f"{mirror}.use")
+            if use_lock is None:
+                continue
+            try:
+                if not mirror.is_dir():
+                    # removed by a concurrent prune
+                    continue
+                mirror_size = get_object_cache_size(mirror)
+                shutil.rmtree(mirror)
+                total_size -= mirror_size
+                removed.append(str(mirror))
+            finally:
+                use_lock.close()
+        finally:
+            write_lock.close()
+
+    return removed
+
+
+def get_contents_api(api_url: str, api_repo: str, api_token: str, badge_branch: str, badge_file: str) -> tuple:
+    """
+    Get a file from the hosting provider contents API
+
+    Parameter(s):
+    api_url     : contents API base url (e.g. https://api.github.com)
+    api_repo    : owner/repo
+    api_token   : API token
+    badge_branch: badge branch name (e.g. badges)
+    badge_file  : file path relative to the repository root
+
+    Return: (blob sha, file content) or (None, None) if the file does not exist
+    """
+    url = get_contents_api_url(api_url, api_repo, badge_file) + f"?{urllib.parse.urlencode({'ref': badge_branch})}"
+    request = urllib.request.Request(url, headers=get_contents_api_headers(api_token))
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            contents = json.load(response)
+    except urllib.error.HTTPError as e:
+        if e.code == 404:
+            return None, None
+        raise
+
+    return contents["sha"], base64.b64decode(contents.get("content", ""))
+
+
+def put_contents_api(
+    api_url: str,
+    api_repo: str,
+    api_token: str,
+    badge_branch: str,
+    badge_file: str,
+    content: bytes | Callable[[bytes | None], bytes],
+    message: str,
+) -> str | None:
+    """
+    Create/update a file with the hosting provider contents API (one HTTP PUT with a SHA precondition)
+
+    A PUT rejected by a concurrent update is retried with the latest SHA. When content is a
+    merge callback, it is called with the latest file content on every attempt, so a
+    read-modify-write (e.g. a shard index) never overwrites a concurrent update.
+
+    Parameter(s):
+    api_url     : contents API base url (e.g. https://api.github.com)
+    api_repo    : owner/repo
+    api_token   : API token
+    badge_branch: badge branch name (e.g. badges)
+    badge_file  : file path relative to the repository root
+    content     : file content, or a merge callback from the current file content (None if missing) to file content
+    message     : commit message
+
+    Return: commit hash, or None if the file is up to date
+    """
+    url = get_contents_api_url(api_url, api_repo, badge_file)
+    for attempt in range(3):
+        sha, current = get_contents_api(api_url, api_repo, api_token, badge_branch, badge_file)
+        new_content = content(current) if callable(content) else content
+        if current == new_content:
+            return None
+
+        body = {"message": message, "content": base64.b64encode(new_content).decode("ascii"), "branch": badge_branch}
+        if sha is not None:
+            body["sha"] = sha
+        request = urllib.request.Request(
+            url, data=json.dumps(body).encode("utf-8"), headers=get_contents_api_headers(api_token), method="PUT"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.load(response)["commit"]["sha"]
+        except urllib.error.HTTPError as e:
+            # 409/422: SHA precondition failed due to a concurrent update
+            if e.code not in [409, 422] or attempt == 2:
+                raise
+
+    return None  # pragma: no cover
+
+
+def get_contents_api_url(api_url: str, api_repo: str, badge_file: str) -> str:
+    """
+    Get the contents API url of a file (path segments are percent-encoded)
+
+    Parameter(s):
+    api_url   : contents API base url (e.g. https://api.github.com)
+    api_repo  : owner/repo
+    badge_file: file path relative to the repository root
+    """
+    return f"{api_url.rstrip('/')}/repos/{api_repo}/contents/{urllib.parse.quote(badge_file)}"
+
+
+def merge_badge_index(current: bytes | None, entries: dict) -> bytes:
+    """
+    Merge badge entries into the current content of a shard index
+
+    Parameter(s):
+    current: current shard index content (None if missing)
+    entries: a python dictionary of badge name to badge entry
+
+    Return: shard index content
+    """
+    badge_index = json.loads(current) if current else {}
+    if not isinstance(badge_index, dict):
+        raise ValueError("shard index is not a JSON object")
+    badge_index.update(entries)
+    return dump_badge_index(badge_index).encode("utf-8")
+
+
+def get_contents_api_headers(api_token: str) -> dict:
+    """
+    Get HTTP headers for the hosting provider contents API
+
+    Parameter(s):
+    api_token: API token
+    """
+    headers = {"Accept": "application/vnd.github+json", "Content-Type": "application/json"}
+    if api_token:
+        headers["Authorization"] = f"Bearer {api_token}"
+    return headers
+
+
+def write_filesystem(publish_dir: str, badge_file: str, content: bytes | Callable[[bytes | None], bytes]) -> bool:
+    """
+    Write a file under the publish folder (e.g. a web root or a mounted object store bucket)
+
+    The file is replaced atomically, so readers never see a partial badge.
+
+    Parameter(s):
+    publish_dir: folder to publish badges to
+    badge_file : file path relative to the publish folder
+    content    : file content, or a merge callback from the current file content (None if missing) to file content
+
+    Return: True if the file is written, False if the file is up to date
+    """
+    file_dst = Path(publish_dir) / badge_file
+    current = file_dst.read_bytes() if file_dst.is_file() else None
+    new_content = content(current) if callable(content) else content
+    if current == new_content:
+        return False
+
+    file_dst.parent.mkdir(parents=True, exist_ok=True)
+    file_tmp = file_dst.with_name(f".{file_dst.name}.{os.getpid()}.tmp")
+    file_tmp.write_bytes(new_content)
+    os.replace(file_tmp, file_dst)
+    return True
+
+
+def push_badges_git(
+    repo: git.Repo,
+    remote_name: str,
+    badges: dict,
+    badge_branch: str,
+    badge_layout: str,
+    msg_suffix: str,
+    gitconfig_name: str,
+    gitconfig_email: str,
+    max_retries: int = 0,
+) -> list | None:
+    """
+    Publish badges with the git publisher (checkout, write badge files, commit, and push in one commit)
+
+    Parameter(s):
+    repo           : repo class object 'git.repo.base.Repo'
+    remote_name    : remote name (e.g. origin)
+    badges         : a python dictionary of badge name to badge dictionary
+    badge_branch   : badge branch name (e.g. badges)
+    badge_layout   : badge folder layout (flat or sharded)
+    msg_suffix     : suffix to append to commit message
+    gitconfig_name : git config user name
+    gitconfig_email: git config user email
+    max_retries    : number of pull and push retries after a rejected push
+
+    Return: a list of changed badge files (with the pushed commit hash)
+    """
+    if checkout_branch(repo, remote_name, badge_branch, gitconfig_name, gitconfig_email) is None:
+        raise ValueError(f"failed to checkout branch ({badge_branch})")
+    print(f"✅ checkout local branch ({badge_branch})")
+    repo.git.pull()
+
+    changed_badges = []
+    for badge_name, badge_dict in badges.items():
+        if not create_badge_json(badge_dict, badge_name, badge_layout):
+            raise ValueError(f"failed to create {get_badge_path(badge_name, badge_layout)}")
+        print(f"✅ created {get_badge_path(badge_name, badge_layout)}")
+        if badge_layout == "sharded" and update_badge_index(badge_dict, badge_name, badge_layout):
+            print(f"✅ updated {get_badge_index_path(badge_name)}")
+        if check_badge_changes(repo, badge_name, badge_layout):
+            changed_badges.append(badge_name)
+
+    # shard indexes of changed badges go into the commit only; an index that changed on its own
+    # (e.g. a rebuilt corrupt index) is reported too, so the commit is never reported as no changes
+    changed_files = [get_badge_path(badge_name, badge_layout) for badge_name in changed_badges]
+    if badge_layout == "sharded":
+        changed_shards = {get_badge_index_path(badge_name) for badge_name in changed_badges}
+        index_files = sorted({get_badge_index_path(badge_name) for badge_name in badges} - changed_shards)
+        changed_files.extend(get_changed_files(repo, index_files))
+    if not changed_files:
+        return []
+    print(f"✅ found {len(changed_files)} change(s) ready to stage, commit, and push to {remote_name}")
+
+    # unchanged badge files in the list are staged as no-ops, so every changed shard index is committed
+    commit_hash = push_changes(repo, remote_name, badge_branch, list(badges), msg_suffix, badge_layout, max_retries)
+    if commit_hash is None:
+        raise ValueError(f"failed to push changes to {remote_name}")
+
+    return [f"{badge_file} ({commit_hash[:7]})" for badge_file in changed_files]
+
+
+def publish_changes(
+    publisher: str,
+    badges: dict,
+    badge_branch: str,
+    badge_layout: str,
+    msg_suffix: str,
+    repo: git.Repo | None = None,
+    remote_name: str = "origin",
+    gitconfig_name: str = "Mona Lisa",
+    gitconfig_email: str = "mona.lisa@github.com",
+    max_retries: int = 0,
+    api_url: str = "",
+    api_repo: str = "",
+    api_token: str = "",
+    publish_dir: str = "",
+) -> list | None:
+    """
+    Publish badges with a publisher backend (git, contents-api, or filesystem)
+
+    Parameter(s):
+    publisher      : publisher backend (git, contents-api, or filesystem)
+    badges         : a python dictionary of badge name to badge dictionary
+    badge_branch   : badge branch name (e.g. badges)
+    badge_layout   : badge folder layout (flat or sharded)
+    msg_suffix     : suffix to append to commit message
+    repo           : repo class object 'git.repo.base.Repo' (git)
+    remote_name    : remote name (git)
+    gitconfig_name : git config user name (git)
+    gitconfig_email: git config user email (git)
+    max_retries    : number of pull and push retries after a rejected push (git)
+    api_url        : contents API base url (contents-api)
+    api_repo       : owner/repo (contents-api)
+    api_token      : API token (contents-api)
+    publish_dir    : folder to publish badges to (filesystem)
+
+    Return: a list of changed badge files (with the commit hash for git and contents-api)
+    """
+    try:
+        invalid_names = [badge_name for badge_name in badges if not check_badge_name(badge_name, badge_layout)]
+        if invalid_names:
+            raise ValueError(f"invalid badge name(s) for the {badge_layout} layout: {', '.join(invalid_names)}")
+
+        if publisher == "git":
+            if repo is None:
+                raise ValueError("git publisher requires a repo")
+            return push_badges_git(
+                repo,
+                remote_name,
+                badges,
+                badge_branch,
+                badge_layout,
+                msg_suffix,
+                gitconfig_name,
+                gitconfig_email,
+                max_retries,
+            )
+
+        message = f"add/update to branch ({badge_branch}) {msg_suffix}"
+        files: dict[str, bytes | Callable[[bytes | None], bytes]] = {
+            get_badge_path(badge_name, badge_layout): (json.dumps(badge_dict, indent=2) + "\n").encode("utf-8")
+            for badge_name, badge_dict in badges.items()
+        }
+
+        if badge_layout == "sharded":
+            shards: dict[str, dict] = {}
+            for badge_name, badge_dict in badges.items():
+                shards.setdefault(get_badge_index_path(badge_name), {})[badge_name] = get_badge_index_entry(
+                    badge_dict, badge_name, badge_layout
+                )
+            for index_file, entries in shards.items():
+                if publisher == "contents-api":
+                    # merged again from the latest index on every PUT attempt
+                    files[index_file] = functools.partial(merge_badge_index, entries=entries)
+                else:
+                    index_path = Path(publish_dir) / index_file
+                    try:
+                        current = index_path.read_bytes() if index_path.is_file() else None
+                        files[index_file] = merge_badge_index(current, entries)
+                    except ValueError:
+                        print(f"❌ {index_path} is not a valid index, rebuilding it from its shard folder")
+                        files[index_file] = merge_badge_index(
+                            dump_badge_index(rebuild_badge_index(index_path.parent)).encode("utf-8"), entries
+                        )
+
+        changes = []
+        for badge_file, content in files.items():
+            if publisher == "contents-api":
+                commit_hash = put_contents_api(api_url, api_repo, api_token, badge_branch, badge_file, content, message)
+                if commit_hash is not None:
+                    changes.append(f"{badge_file} ({commit_hash[:7]})")
+            elif publisher == "filesystem":
+                if write_filesystem(publish_dir, badge_file, content):
+                    changes.append(badge_file)
+            else:
+                raise ValueError(f"unknown publisher ({publisher})")
+
+        return changes
+
+    except Exception as e:
+        print(f"❌ {e}")
+        return None
+
+
+def check_publisher_inputs(publisher: str, api_url: str, api_repo: str, publish_dir: str, public_url: str) -> bool:
+    """
+    Check publisher inputs
+
+    Parameter(s):
+    publisher  : publisher backend (git, contents-api, or filesystem)
+    api_url    : contents API base url
+    api_repo   : owner/repo
+    publish_dir: folder to publish badges to
+    public_url : public base url that serves the publish folder
+    """
+    if publisher == "contents-api":
+        return bool(validators.url(api_url)) and api_repo.count("/") == 1
+    elif publisher == "filesystem":
+        return bool(publish_dir) and bool(validators.url(public_url))
+    else:
+        return publisher in AVAILABLE_PUBLISHERS
+
+
+def run_publisher(
+    publisher: str,
+    bundles: dict,
+    badge_branch: str,
+    badge_layout: str,
+    remote_name: str,
+    gitconfig_name: str,
+    gitconfig_email: str,
+    max_retries: int,
+    api_url: str,
+    api_repo: str,
+    api_token: str,
+    publish_dir: str,
+    public_url: str,
+    object_cache: str,
+    object_cache_size: int,
+    repo: git.Repo | None = None,
+) -> bool:
+    """
+    Publish badges with a publisher backend and print endpoint badges
+
+    Parameter(s):
+    publisher        : publisher backend (git, contents-api, or filesystem)
+    bundles          : a python dictionary of badge name to {"badge": badge dictionary, "badgeUrl": badge clickable url}
+    badge_branch     : badge branch name (e.g. badges)
+    badge_layout     : badge folder layout (flat or sharded)
+    remote_name      : remote name (git)
+    gitconfig_name   : git config user name (git)
+    gitconfig_email  : git config user email (git)
+    max_retries      : number of pull and push retries after a rejected push (git)
+    api_url          : contents API base url (contents-api)
+    api_repo         : owner/repo (default: owner/repo of the origin remote)
+    api_token        : API token (contents-api)
+    publish_dir      : folder to publish badges to (filesystem)
+    public_url       : public base url that serves the badges (default: raw.githubusercontent.com)
+    object_cache     : shared object cache folder (git)
+    object_cache_size: maximum object cache size in MB (git)
+    repo             : repo class object 'git.repo.base.Repo' (default: repo of the current folder)
+    """
+    if publisher == "git" or (publisher == "contents-api" and not api_repo):
+        try:
+            repo = repo if repo is not None else get_repo()
+            if publisher == "contents-api":
+                api_repo = get_owner_repo(repo)
+        except Exception as e:
+            print(f"❌ {e}")
+            return False
+
+    if not check_publisher_inputs(publisher, api_url, api_repo, publish_dir, public_url):
+        print(f"❌ one or more of your {publisher} publisher inputs failed validations")
+        return False
+
+    msg_suffix = "[CI - Testing]" if "COVERAGE_RUN" in os.environ else ""
+    badges = {badge_name: bundle["badge"] for badge_name, bundle in bundles.items()}
+    use_lock = None
+    if publisher == "git" and object_cache and repo is not None:
+        use_lock = attach_object_cache(repo, remote_name, object_cache)
+    try:
+        changes = publish_changes(
+            publisher,
+            badges,
+            badge_branch,
+            badge_layout,
+            msg_suffix,
+            repo=repo,
+            remote_name=remote_name,
+            gitconfig_name=gitconfig_name,
+            gitconfig_email=gitconfig_email,
+            max_retries=max_retries,
+            api_url=api_url,
+            api_repo=api_repo,
+            api_token=api_token,
+            publish_dir=publish_dir,
+        )
+    finally:
+        if use_lock is not None and repo is not None:
+            if close_object_cache(repo, remote_name, object_cache, object_cache_size, use_lock):
+                print(f"✅ updated object cache ({object_cache})")
+
+    if changes is None:
+        print(f"❌ failed to publish changes with {publisher}")
+        return False
+    elif changes:
+        for change in changes:
+            print(f"✅ published {change} with {publisher}")
+    else:
+        print("✅ found no changes (current is up to date)")
+
+    if not public_url and publisher == "contents-api":
+        public_url = f"https://raw.githubusercontent.com/{api_repo}/refs/heads/{badge_branch}"
+
+    print()
+    for badge_name, bundle in bundles.items():
+        endpoint_badge = create_shieldsio_endpoint_badge(
+            repo, badge_branch, badge_name, bundle["badgeUrl"], badge_layout, public_url
+        )
+        print(f"🎉 Endpoint Badge: {endpoint_badge}")
+
+    return True
+
+
+def create_badge_bundle(badge_dict: dict, badge_name: str, badge_url: str, bundle_dir: str) -> str | None:
+    """
+    Create a content-hashed badge bundle (no git access) to publish in a later stage
+
+    Parameter(s):
+    badge_dict: a python dictionary in shields.io endpoint badge schema
+    badge_name: badge filename (e.g. badge)
+    badge_url : badge clickable url
+    bundle_dir: folder to hold badge bundles
+
+    Return: bundle file path (<bundle_dir>/<badge_name>.<content-hash>.json)
+    """
+    if not isinstance(badge_dict, dict):
+        return None
+
+    bundle = {
+        "bundleVersion": 1,
+        "badgeName": badge_name,
+        "badgeUrl": badge_url,
+        "timestamp": time.time(),
+        "badge": badge_dict,
+    }
+    content = json.dumps(bundle, separators=(",", ":"), sort_keys=True)
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+    Path(bundle_dir).mkdir(parents=True, exist_ok=True)
+    bundle_file_dst = f"{bundle_dir}/{badge_name}.{content_hash}.json"
+    with open(bundle_file_dst, "w") as json_file:
+        json_file.write(content)
+        json_file.write("\n")
+
+    return bundle_file_dst
+
+
+def check_badge_name(badge_name: str, badge_layout: str = "flat") -> bool:
+    """
+    Check if the badge name is a safe filename (no folders, no parent references)
+
+    In the sharded layout, index is reserved for the shard index (badges/<hash-prefix>/index.json).
+
+    Parameter(s):
+    badge_name  : badge filename (e.g. badge)
+    badge_layout: badge folder layout (flat or sharded)
+    """
+    return (
+        isinstance(badge_name, str)
+        and len(badge_name) > 0
+        and not any(char in badge_name for char in ["/", "\\", "\0"])
+        and badge_name not in [".", ".."]
+        and not (badge_layout == "sharded" and badge_name == "index")
+    )
+
+
+def check_badge_bundle(bundle: dict) -> bool:
+    """
+    Check field types and values of a badge bundle
+
+    Parameter(s):
+    bundle: a python dictionary read from a bundle file
+    """
+    if not isinstance(bundle, dict) or not isinstance(bundle.get("badge"), dict):
+        return False
+
+    badge = bundle["badge"]
+    badge_fields = ["style", "label", "labelColor", "message", "color"]
+    if not all(
+        [
+            bundle.get("bundleVersion") == 1,
+            isinstance(bundle.get("badgeName"), str) and check_badge_name(bundle["badgeName"]),
+            isinstance(bundle.get("badgeUrl"), str),
+            isinstance(bundle.get("timestamp"), (int, float)) and not isinstance(bundle.get("timestamp"), bool),
+            badge.get("schemaVersion") == 1,
+            all(isinstance(badge.get(field), str) for field in badge_fields),
+        ]
+    ):
+        return False
+
+    return check_user_inputs(AVAILABLE_BADGE_STYLES, badge["style"], bundle["badgeUrl"], badge["labelColor"], badge["color"])
+
+
+def read_badge_bundles(bundle_paths: list, badge_layout: str = "flat") -> list:
+    """
+    Read and verify badge bundles
+
+    A bundle is skipped when its content does not match the hash in its filename,
+    when its badge fails the same checks as the command line options, or when its
+    badge name is reserved in the badge layout.
+
+    Parameter(s):
+    bundle_paths: a list of bundle files and/or folders holding bundle files
+    badge_layout: badge folder layout to publish the bundles to (flat or sharded)
+    """
+    bundle_files = []
+    for bundle_path in bundle_paths:
+        if Path(bundle_path).is_dir():
+            bundle_files.extend(sorted(Path(bundle_path).glob("*.json")))
+        else:
+            bundle_files.append(Path(bundle_path))
+
+    bundles = []
+    for bundle_file in bundle_files:
+        try:
+            content = bundle_file.read_text().strip()
+            content_hash = bundle_file.name.rsplit(".", 2)[-2]
+            if hashlib.sha256(content.encode("utf-8")).hexdigest()[:16] != content_hash:
+                raise ValueError("content does not match its hash")
+
+            bundle = json.loads(content)
+            if not check_badge_bundle(bundle):
+                raise ValueError("bundle failed validations")
+            if not check_badge_name(bundle["badgeName"], badge_layout):
+                raise ValueError(f"badge name ({bundle['badgeName']}) is reserved in the {badge_layout} layout")
+            bundle["contentHash"] = content_hash
+            bundles.append(bundle)
+
+        except (OSError, IndexError, KeyError, TypeError, ValueError) as e:
+            print(f"❌ skipped bundle {bundle_file}: {e}")
+
+    return bundles
+
+
+def merge_badge_bundles(bundles: list) -> dict:
+    """
+    Merge badge bundles by keeping the latest bundle per badge name
+
+    Parameter(s):
+    bundles: a list of badge bundles from read_badge_bundles
+
+    Return: a python dictionary of badge name to badge bundle
+    """
+    merged = {}
+    for bundle in sorted(bundles, key=lambda bundle: (bundle["timestamp"], bundle["contentHash"])):
+        merged[bundle["badgeName"]] = bundle
+
+    return dict(sorted(merged.items()))
+
+
+BADGE_OPTIONS = [
+    click.option("--badge-name", default="badge", help="default: badge"),
+    click.option("--badge-url", default="", help="default: ''"),
+    click.option("--badge-style", default="flat", help="default: flat (flat, flat-square, plastic, for-the-badge, social)"),
+    click.option("--label", default="demo", help="default: demo (badge left side text)"),
+    click.option("--label-color", default="2e2e2e", help="default: 2e2e2e (badge left side hex color)"),
+    click.option("--message", default="no status", help="default: no status (badge right side text)"),
+    click.option("--message-color", default="2986CC", help="default: 2986CC (badge right side hex color)"),
+]
+BRANCH_OPTIONS = [
+    click.option("--badge-branch", default="badges", help="default: badges"),
+    click.option(
+        "--badge-layout",
+        default="flat",
+        type=click.Choice(["flat", "sharded"]),
+        help="default: flat (sharded stores badges/<hash-prefix>/<name>.json with a shard index.json)",
+    ),
+    click.option("--remote-name", default="origin", help="default: origin"),
+    click.option("--gitconfig-name", default="Mona Lisa", help="default: Mona Lisa"),
+    click.option("--gitconfig-email", default="mona.lisa@github.com", help="default: mona.lisa@github.com"),
+    click.option(
+        "--max-retries", default=0, type=click.IntRange(min=0), help="default: 0 (pull and push retries on rejection)"
+    ),
+]
+PUBLISHER_OPTIONS = [
+    click.option("--publisher", default="git", type=click.Choice(AVAILABLE_PUBLISHERS), help="default: git"),
+    click.option("--api-url", default="https://api.github.com", help="default: https://api.github.com (contents-api)"),
+    click.option("--api-repo", default="", help="default: owner/repo of the origin remote (contents-api)"),
+    click.option("--api-token", default="", envvar="GITHUB_TOKEN", help="default: $GITHUB_TOKEN (contents-api)"),
+    click.option("--publish-dir", default="", help="default: '' (filesystem)"),
+    click.option("--public-url", default="", help="default: raw.githubusercontent.com (base url that serves the badges)"),
+    click.option("--object-cache", default="", help="default: '' (shared object cache folder, e.g. ~/.cache/setup-badge)"),
+    click.option(
+        "--object-cache-size", default=1024, type=click.IntRange(min=0), help="default: 1024 (object cache size in MB)"
+    ),
+]
+
+
+def add_options(options: list):
+    """
+    Apply a list of click options to a command (options shared by main and its commands)
+
+    Parameter(s):
+    options: a list of click option decorators
+    """
+
+    def decorator(func):
+        for option in reversed(options):
+            func = option(func)
+        return func
+
+    return decorator
+
+
+@click.group(invoke_without_command=True)
+@add_options(BADGE_OPTIONS)
+@add_options(BRANCH_OPTIONS)
+@add_options(PUBLISHER_OPTIONS)
 @click.version_option(version=__version__)
+@click.pass_context
 def main(
+    ctx,
     badge_branch,
     badge_name,
+    badge_layout,
     remote_name,
     badge_style,
     badge_url,
@@ -282,51 +1370,139 @@ def main(
     message_color,
     gitconfig_name,
     gitconfig_email,
+    max_retries,
+    publisher,
+    api_url,
+    api_repo,
+    api_token,
+    publish_dir,
+    public_url,
+    object_cache,
+    object_cache_size,
 ):
-    repo = get_repo()
-    available_badge_styles = ["flat", "flat-square", "plastic", "for-the-badge", "social"]
+    if ctx.invoked_subcommand is not None:
+        # options of the one-shot flow do not apply to generate/publish, which have their own options
+        group_options = [
+            f"--{param.name.replace('_', '-')}"
+            for param in ctx.command.params
+            if param.name is not None and ctx.get_parameter_source(param.name) == ParameterSource.COMMANDLINE
+        ]
+        if group_options:
+            raise click.UsageError(
+                f"{', '.join(group_options)} cannot be used before the '{ctx.invoked_subcommand}' command "
+                f"(pass the options of 'setup-badge {ctx.invoked_subcommand} --help' after the command)"
+            )
+        return
+
+    repo = get_repo() if publisher == "git" else None
 
     print(f"🚀 Starting to create a badge ({badge_name}.json) on branch ({badge_branch})...\n")
-    if check_user_inputs(available_badge_styles, badge_style, badge_url, label_color, message_color):
+    if check_badge_name(badge_name, badge_layout) and check_user_inputs(
+        AVAILABLE_BADGE_STYLES, badge_style, badge_url, label_color, message_color
+    ):
         print("✅ validated inputs from command line options")
 
-        if checkout_branch(repo, remote_name, badge_branch, gitconfig_name, gitconfig_email) is not None:
-            print(f"✅ checkout local branch ({badge_branch})")
-            repo.git.pull()
-
-            badge_dict = create_badge_dict(badge_style, label, label_color, message, message_color)
-            if create_badge_json(badge_dict, badge_name):
-                print(f"✅ created badges/{badge_name}.json")
-
-                if check_badge_changes(repo, badge_name):
-                    print(f"✅ found changes ready to stage, commit, and push to {remote_name}")
-
-                    msg_suffix = "[CI - Testing]" if "COVERAGE_RUN" in os.environ else ""
-                    commit_hash = push_changes(repo, remote_name, badge_branch, badge_name, msg_suffix)
-                    if commit_hash is not None:
-                        print(f"✅ pushed commit ({commit_hash[:7]}) to remote branch ({badge_branch})")
+        bundles = {
+            badge_name: {
+                "badge": create_badge_dict(badge_style, label, label_color, message, message_color),
+                "badgeUrl": badge_url,
+            }
+        }
+        run_publisher(
+            publisher,
+            bundles,
+            badge_branch,
+            badge_layout,
+            remote_name,
+            gitconfig_name,
+            gitconfig_email,
+            max_retries,
+            api_url,
+            api_repo,
+            api_token,
+            publish_dir,
+            public_url,
+            object_cache,
+            object_cache_size,
+            repo,
+        )
 
-                        endpoint_badge = create_shieldsio_endpoint_badge(repo, badge_branch, badge_name, badge_url)
-                        print(f"\n🎉 Endpoint Badge: {endpoint_badge}")
+    else:
+        print("❌ one or more of your inputs failed validations")
 
-                    else:
-                        print(f"❌ failed to push changes to {remote_name}")
+    if "COVERAGE_RUN" in os.environ and repo is not None:
+        if cicleanup(repo, remote_name, badge_branch):
+            print(f"🗑️ deleted remote branch ({badge_branch})")
 
-                else:
-                    print("✅ found no changes (current is up to date)")
 
-                    endpoint_badge = create_shieldsio_endpoint_badge(repo, badge_branch, badge_name, badge_url)
-                    print(f"\n🎉 Endpoint Badge: {endpoint_badge}")
+@main.command()
+@add_options(BADGE_OPTIONS)
+@click.option("--bundle-dir", default="badge-bundles", help="default: badge-bundles")
+def generate(badge_name, badge_url, badge_style, label, label_color, message, message_color, bundle_dir):
+    """Validate inputs and write a badge bundle (no git access)"""
+    print(f"🚀 Starting to generate a badge bundle ({badge_name}) in folder ({bundle_dir})...\n")
+    if check_badge_name(badge_name) and check_user_inputs(
+        AVAILABLE_BADGE_STYLES, badge_style, badge_url, label_color, message_color
+    ):
+        print("✅ validated inputs from command line options")
 
-            else:
-                print(f"❌ failed to create {badge_name}.json")
+        badge_dict = create_badge_dict(badge_style, label, label_color, message, message_color)
+        bundle_file = create_badge_bundle(badge_dict, badge_name, badge_url, bundle_dir)
+        if bundle_file is not None:
+            print(f"✅ created {bundle_file}")
+        else:
+            print(f"❌ failed to create bundle for {badge_name}")
 
     else:
         print("❌ one or more of your inputs failed validations")
 
-    if "COVERAGE_RUN" in os.environ:
-        if cicleanup(repo, remote_name, badge_branch):
-            print(f"🗑️ deleted remote branch ({badge_branch})")
+
+@main.command()
+@click.argument("bundle_paths", nargs=-1, type=click.Path(exists=True))
+@add_options(BRANCH_OPTIONS)
+@add_options(PUBLISHER_OPTIONS)
+def publish(
+    bundle_paths,
+    badge_branch,
+    badge_layout,
+    remote_name,
+    gitconfig_name,
+    gitconfig_email,
+    max_retries,
+    publisher,
+    api_url,
+    api_repo,
+    api_token,
+    publish_dir,
+    public_url,
+    object_cache,
+    object_cache_size,
+):
+    """Merge badge bundles (latest per badge) and push them in one commit"""
+    print(f"🚀 Starting to publish badge bundles on branch ({badge_branch})...\n")
+    bundles = merge_badge_bundles(read_badge_bundles(list(bundle_paths) or ["badge-bundles"], badge_layout))
+    if not bundles:
+        print("❌ found no valid badge bundles")
+        return
+    print(f"✅ merged {len(bundles)} badge(s) from bundles")
+
+    run_publisher(
+        publisher,
+        bundles,
+        badge_branch,
+        badge_layout,
+        remote_name,
+        gitconfig_name,
+        gitconfig_email,
+        max_retries,
+        api_url,
+        api_repo,
+        api_token,
+        publish_dir,
+        public_url,
+        object_cache,
+        object_cache_size,
+    )
 
 
 if __name__ == "__main__":  # pragma: no cover
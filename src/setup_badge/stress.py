@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+
+"""
+Purpose: Stress test concurrent badge publishers against a local bare remote
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import click
+import git
+
+from setup_badge import __version__
+from setup_badge.cli import (
+    check_badge_changes,
+    checkout_branch,
+    create_badge_dict,
+    create_badge_json,
+    get_badge_index_path,
+    get_badge_path,
+    push_changes,
+    update_badge_index,
+)
+
+GITCONFIG_NAME = "Mona Lisa"
+GITCONFIG_EMAIL = "mona.lisa@github.com"
+BARRIER_TIMEOUT = 300
+
+
+def create_bare_remote(workdir: str, badge_branch: str) -> str:
+    """
+    Create a local bare remote with a main branch and an empty badge branch
+
+    Parameter(s):
+    workdir     : directory to hold the bare remote and the seed clone
+    badge_branch: badge branch name (e.g. badges)
+
+    Return: path to the bare remote
+    """
+    remote_path = os.path.join(workdir, "remote.git")
+    git.Repo.init(remote_path, bare=True, initial_branch="main")
+
+    seed = git.Repo.init(os.path.join(workdir, "seed"), initial_branch="main")
+    with seed.config_writer() as writer:
+        writer.set_value("user", "name", GITCONFIG_NAME)
+        writer.set_value("user", "email", GITCONFIG_EMAIL)
+
+    readme = Path(seed.working_dir) / "badges" / "README.md"
+    readme.parent.mkdir(parents=True, exist_ok=True)
+    readme.write_text("## Badges\n")
+    seed.index.add(["badges/README.md"])
+    seed.index.commit("initial commit")
+
+    origin = seed.create_remote("origin", remote_path)
+    origin.push("main:main")
+    origin.push(f"main:{badge_branch}")
+
+    return remote_path
+
+
+def get_writer_badge_name(writer_id: int, same_shard: bool = False) -> str:
+    """
+    Get the badge name of a writer (writer-<id>)
+
+    Parameter(s):
+    writer_id : writer number
+    same_shard: pick a name in the shard of writer-0 (writer-<id>-<n>), so every writer updates one shard index
+    """
+    badge_name = f"writer-{writer_id}"
+    shard_index = get_badge_index_path("writer-0")
+    suffix = 0
+    while same_shard and get_badge_index_path(badge_name) != shard_index:
+        badge_name = f"writer-{writer_id}-{suffix}"
+        suffix += 1
+
+    return badge_name
+
+
+def run_writer(
+    remote_path: str,
+    workdir: str,
+    writer_id: int,
+    updates: int,
+    badge_branch: str,
+    max_retries: int,
+    barrier=None,
+    badge_layout: str = "flat",
+    same_shard: bool = False,
+) -> dict:
+    """
+    Run one simulated publisher (checkout_branch -> create_badge_json -> push_changes)
+
+    Every update writes the writer's own badge (writer-<id>), and push_changes retries
+    a rejected push with a pull (merge) and push up to max_retries times.
+
+    Parameter(s):
+    remote_path : path to the bare remote
+    workdir     : directory to hold the writer clone
+    writer_id   : writer number
+    updates     : number of badge updates to publish
+    badge_branch: badge branch name (e.g. badges)
+    max_retries : number of pull and push retries after a rejected push
+    barrier     : optional barrier to start all writers at the same time
+    badge_layout: badge folder layout (flat or sharded)
+    same_shard  : write every badge to one shard (sharded), so writers conflict on the shard index
+
+    Return: writer statistics
+    """
+    badge_name = get_writer_badge_name(writer_id, same_shard)
+    stats: dict = {
+        "writer": writer_id,
+        "badge": badge_name,
+        "latencies": [],
+        "successes": 0,
+        "failures": 0,
+        "push_attempts": 0,
+        "rejections": 0,
+        "commits": [],
+    }
+    cwd = os.getcwd()
+
+    try:
+        repo = git.Repo.clone_from(remote_path, os.path.join(workdir, badge_name))
+        with repo.config_writer() as writer:
+            writer.set_value("user", "name", GITCONFIG_NAME)
+            writer.set_value("user", "email", GITCONFIG_EMAIL)
+        os.chdir(repo.working_dir)
+
+        if barrier is not None:
+            barrier.wait(timeout=BARRIER_TIMEOUT)
+
+        for update in range(updates):
+            message = f"{writer_id}-{update}"
+            start = time.perf_counter()
+
+            if checkout_branch(repo, "origin", badge_branch, GITCONFIG_NAME, GITCONFIG_EMAIL) is None:
+                stats["failures"] += 1
+                continue
+
+            badge_dict = create_badge_dict("flat", badge_name, "2e2e2e", message, "2986CC")
+            if not create_badge_json(badge_dict, badge_name, badge_layout):
+                stats["failures"] += 1
+                continue
+            if badge_layout == "sharded":
+                update_badge_index(badge_dict, badge_name, badge_layout)
+            if not check_badge_changes(repo, badge_name, badge_layout):
+                stats["failures"] += 1
+                continue
+
+            commit_hash = push_changes(
+                repo, "origin", badge_branch, badge_name, f"[stress {message}]", badge_layout, max_retries, stats
+            )
+            if commit_hash is None:
+                stats["failures"] += 1
+                # drop the unacknowledged commit so the next update starts from the remote state
+                repo.git.fetch("origin")
+                repo.git.reset("--hard", f"origin/{badge_branch}")
+                continue
+
+            stats["latencies"].append(time.perf_counter() - start)
+            stats["successes"] += 1
+            stats["commits"].append([commit_hash, message])
+
+    except Exception as e:
+        print(f"❌ writer-{writer_id}: {e}")
+        # release the other writers waiting at the barrier, and count the remaining updates as failed
+        if barrier is not None:
+            with contextlib.suppress(Exception):
+                barrier.abort()
+        stats["failures"] = updates - stats["successes"]
+
+    finally:
+        os.chdir(cwd)
+
+    return stats
+
+
+def run_writer_quiet(*args) -> dict:
+    """
+    Run one simulated publisher without its console output
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_writer(*args)
+
+
+def count_lost_updates(remote_path: str, badge_branch: str, writer_stats: list, badge_layout: str = "flat") -> int:
+    """
+    Count acknowledged badge updates that did not survive on the remote badge branch
+
+    An update is lost when its pushed commit is not reachable from the final branch head,
+    or when a writer's badge (or its shard index entry) on the final branch does not hold
+    its last acknowledged message.
+
+    Parameter(s):
+    remote_path : path to the bare remote
+    badge_branch: badge branch name (e.g. badges)
+    writer_stats: a list of writer statistics from run_writer
+    badge_layout: badge folder layout (flat or sharded)
+    """
+    remote = git.Repo(remote_path)
+    head = remote.commit(badge_branch)
+    lost = 0
+
+    for stats in writer_stats:
+        for commit_hash, _ in stats["commits"]:
+            try:
+                if not remote.is_ancestor(commit_hash, head):
+                    lost += 1
+            except git.GitCommandError:
+                # commit object never reached the remote
+                lost += 1
+
+        if stats["commits"]:
+            badge_name = stats["badge"]
+            last_message = stats["commits"][-1][1]
+            try:
+                blob = head.tree / get_badge_path(badge_name, badge_layout)
+                final_message = json.loads(blob.data_stream.read()).get("message")
+                if badge_layout == "sharded":
+                    blob = head.tree / get_badge_index_path(badge_name)
+                    if json.loads(blob.data_stream.read()).get(badge_name, {}).get("message") != final_message:
+                        final_message = None
+            except KeyError:
+                final_message = None
+            if final_message != last_message:
+                lost += 1
+
+    return lost
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Get the nearest-rank percentile of a list of values
+
+    Parameter(s):
+    values: a list of numbers
+    pct   : percentile between 0 and 100
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(writer_stats: list, elapsed: float, lost_updates: int) -> dict:
+    """
+    Summarize writer statistics into a stress test report
+
+    Parameter(s):
+    writer_stats: a list of writer statistics from run_writer
+    elapsed     : wall-clock seconds of the whole run
+    lost_updates: number of lost updates from count_lost_updates
+    """
+    latencies = [latency for stats in writer_stats for latency in stats["latencies"]]
+    successes = sum(stats["successes"] for stats in writer_stats)
+    push_attempts = sum(stats["push_attempts"] for stats in writer_stats)
+    rejections = sum(stats["rejections"] for stats in writer_stats)
+
+    return {
+        "writers": len(writer_stats),
+        "successes": successes,
+        "failures": sum(stats["failures"] for stats in writer_stats),
+        "elapsed": elapsed,
+        "throughput": successes / elapsed if elapsed > 0 else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "push_attempts": push_attempts,
+        "rejections": rejections,
+        "rejection_rate": rejections / push_attempts if push_attempts else 0.0,
+        "lost_updates": lost_updates,
+    }
+
+
+def run_stress(
+    writers: int,
+    updates: int,
+    badge_branch: str,
+    max_retries: int,
+    workdir: str,
+    verbose: bool,
+    badge_layout: str = "flat",
+    same_shard: bool = False,
+) -> dict:
+    """
+    Run K concurrent writers against a local bare remote and report the results
+
+    Parameter(s):
+    writers     : number of concurrent writers (processes)
+    updates     : number of badge updates per writer
+    badge_branch: badge branch name (e.g. badges)
+    max_retries : number of pull and push retries after a rejected push
+    workdir     : directory to hold the bare remote and writer clones
+    verbose     : show output from the publish path of every writer
+    badge_layout: badge folder layout (flat or sharded)
+    same_shard  : write every badge to one shard (sharded)
+    """
+    remote_path = create_bare_remote(workdir, badge_branch)
+
+    with multiprocessing.Manager() as manager:
+        barrier = manager.Barrier(writers)
+        with ProcessPoolExecutor(max_workers=writers) as executor:
+            start = time.perf_counter()
+            futures = [
+                executor.submit(
+                    run_writer_quiet if not verbose else run_writer,
+                    remote_path,
+                    workdir,
+                    writer_id,
+                    updates,
+                    badge_branch,
+                    max_retries,
+                    barrier,
+                    badge_layout,
+                    same_shard,
+                )
+                for writer_id in range(writers)
+            ]
+            writer_stats = [future.result() for future in futures]
+            elapsed = time.perf_counter() - start
+
+    lost_updates = count_lost_updates(remote_path, badge_branch, writer_stats, badge_layout)
+    return summarize(writer_stats, elapsed, lost_updates)
+
+
+@click.command()
+@click.option("--writers", default=4, type=click.IntRange(min=1), help="default: 4 (concurrent writers)")
+@click.option("--updates", default=5, type=click.IntRange(min=1), help="default: 5 (badge updates per writer)")
+@click.option("--badge-branch", default="badges", help="default: badges")
+@click.option("--max-retries", default=0, type=click.IntRange(min=0), help="default: 0 (pull and push retries on rejection)")
+@click.option(
+    "--badge-layout",
+    default="flat",
+    type=click.Choice(["flat", "sharded"]),
+    help="default: flat (sharded stores badges/<hash-prefix>/<name>.json with a shard index.json)",
+)
+@click.option(
+    "--same-shard", is_flag=True, default=False, help="default: False (sharded: every writer updates one shard index)"
+)
+@click.option("--report-json", default="", help="default: '' (write the report to a json file)")
+@click.option("--verbose", is_flag=True, default=False, help="default: False (show output from every writer)")
+@click.version_option(version=__version__)
+def main(writers, updates, badge_branch, max_retries, badge_layout, same_shard, report_json, verbose):
+    print(f"🚀 Starting stress test with {writers} writer(s) x {updates} update(s) on branch ({badge_branch})...\n")
+
+    with tempfile.TemporaryDirectory(prefix="setup-badge-stress-") as workdir:
+        report = run_stress(writers, updates, badge_branch, max_retries, workdir, verbose, badge_layout, same_shard)
+
+    print(f"✅ successful updates: {report['successes']} (failed: {report['failures']}) in {report['elapsed']:.2f}s")
+    print(f"📊 throughput      : {report['throughput']:.2f} updates/s")
+    print(
+        f"📊 latency         : p50 {report['latency_p50']:.3f}s"
+        f" / p95 {report['latency_p95']:.3f}s / p99 {report['latency_p99']:.3f}s"
+    )
+    print(f"📊 rejection rate  : {report['rejection_rate']:.1%} ({report['rejections']}/{report['push_attempts']} pushes)")
+    print(f"📊 lost updates    : {report['lost_updates']}")
+
+    if report_json:
+        with open(report_json, "w") as json_file:
+            json.dump(report, json_file, indent=2)
+            json_file.write("\n")
+        print(f"\n✅ wrote report to {report_json}")
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
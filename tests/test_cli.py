@@ -4,21 +4,44 @@
 Purpose: tests
 """
 
+import base64
+import hashlib
+import json
 import os
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import git
 import pytest
 from click.testing import CliRunner
 
 from setup_badge.cli import (
+    attach_object_cache,
+    check_badge_changes,
+    check_badge_name,
+    check_publisher_inputs,
     check_user_inputs,
     checkout_branch,
     cicleanup,
+    close_object_cache,
+    create_badge_bundle,
     create_badge_dict,
     create_badge_json,
     create_shieldsio_endpoint_badge,
+    get_badge_index_path,
+    get_badge_path,
+    get_object_cache_mirror,
+    lock_object_cache,
     main,
+    merge_badge_bundles,
+    prune_object_cache,
+    publish_changes,
     push_changes,
+    put_contents_api,
+    read_badge_bundles,
+    read_badge_index,
+    update_badge_index,
 )
 
 
@@ -31,6 +54,82 @@ def get_repo():
     return git.Repo(os.getcwd())
 
 
+@pytest.fixture
+def bare_remote(tmp_path):
+    """
+    Local bare remote with a main branch and a ci-testing badge branch (badges/README.md)
+    Return: path to the bare remote
+    """
+    remote_path = str(tmp_path / "remote.git")
+    git.Repo.init(remote_path, bare=True, initial_branch="main")
+
+    seed = git.Repo.init(tmp_path / "seed", initial_branch="main")
+    with seed.config_writer() as writer:
+        writer.set_value("user", "name", "Mona Lisa")
+        writer.set_value("user", "email", "mona.lisa@github.com")
+    (tmp_path / "seed" / "badges").mkdir()
+    (tmp_path / "seed" / "badges" / "README.md").write_text("## Badges\n")
+    seed.index.add(["badges/README.md"])
+    seed.index.commit("initial commit")
+
+    origin = seed.create_remote("origin", remote_path)
+    origin.push("main:main")
+    origin.push("main:ci-testing")
+
+    return remote_path
+
+
+@pytest.fixture
+def contents_api():
+    """
+    Local stand-in for the hosting provider contents API (GET/PUT with SHA precondition)
+    Return: (api url, files dictionary, server state)
+    """
+    files = {}
+    state = {"puts": 0, "conflicts": 0, "before_put": {}}
+
+    class ContentsHandler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, code, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            path = urllib.parse.unquote(self.path.split("/contents/", 1)[1].split("?", 1)[0])
+            if path not in files:
+                return self.send_json(404, {"message": "Not Found"})
+            sha = hashlib.sha1(files[path]).hexdigest()
+            self.send_json(200, {"sha": sha, "content": base64.b64encode(files[path]).decode("ascii")})
+
+        def do_PUT(self):
+            path = urllib.parse.unquote(self.path.split("/contents/", 1)[1])
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            before_put = state["before_put"].pop(path, None)
+            if before_put is not None:
+                # simulate a concurrent update landing between the client's GET and PUT
+                before_put(files)
+            current_sha = hashlib.sha1(files[path]).hexdigest() if path in files else None
+            if state["conflicts"] > 0 or body.get("sha") != current_sha:
+                state["conflicts"] = max(0, state["conflicts"] - 1)
+                return self.send_json(409, {"message": "sha does not match"})
+            files[path] = base64.b64decode(body["content"])
+            state["puts"] += 1
+            self.send_json(200, {"commit": {"sha": f"{state['puts']:040x}"}})
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ContentsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", files, state
+    server.shutdown()
+    server.server_close()
+
+
 def test_get_repo(get_repo):
     """
     Test to verify that get_repo fixture provides a valid GitPython Repo object
@@ -292,6 +391,150 @@ def test_create_badge_json_return_false():
     assert result is False
 
 
+def test_get_badge_path_return_flat_path():
+    """
+    Test get badge path (flat layout)
+
+    Expect Result: badges/<name>.json
+    """
+    assert get_badge_path("ci-testing") == "badges/ci-testing.json"
+
+
+def test_get_badge_path_return_sharded_path():
+    """
+    Test get badge path (sharded layout)
+
+    Expect Result: badges/<hash-prefix>/<name>.json with a stable 2-character hash prefix
+    """
+    result = get_badge_path("ci-testing", "sharded")
+    print(f"\nGet badge path result: {result}")
+
+    assert result == get_badge_path("ci-testing", "sharded")
+    assert result.startswith("badges/") and result.endswith("/ci-testing.json")
+    assert len(result.split("/")[1]) == 2
+
+
+def test_create_badge_json_return_true_sharded(tmp_path, monkeypatch):
+    """
+    Test create badge json file from python dictionary (sharded layout)
+
+    Expect Result: True and json file created in shard folder
+    """
+    monkeypatch.chdir(tmp_path)
+    badge_dict = create_badge_dict("flat", "demo", "000", "no status", "FFF")
+    badge_name = "ci-testing"
+
+    result = create_badge_json(badge_dict, badge_name, "sharded")
+    print(f"\nCreate badge JSON from python dictionary result: {result}")
+
+    assert result is True
+    with open(tmp_path / get_badge_path(badge_name, "sharded")) as json_file:
+        assert json.load(json_file) == badge_dict
+
+
+def test_update_badge_index_return_true(tmp_path, monkeypatch):
+    """
+    Test add/update badge entries in shard indexes (badges/<hash-prefix>/index.json)
+
+    Expect Result: True, each badge in its own shard index with one entry per line
+    """
+    monkeypatch.chdir(tmp_path)
+    assert update_badge_index(create_badge_dict("flat", "demo", "000", "one", "FFF"), "badge-1", "sharded") is True
+    assert update_badge_index(create_badge_dict("flat", "demo", "000", "two", "FFF"), "badge-2", "sharded") is True
+    assert update_badge_index(create_badge_dict("flat", "demo", "000", "three", "FFF"), "badge-1", "sharded") is True
+
+    with open(tmp_path / get_badge_index_path("badge-1")) as json_file:
+        shard_index = json.load(json_file)
+
+    assert shard_index == {"badge-1": {"path": get_badge_path("badge-1", "sharded"), "message": "three"}}
+    assert read_badge_index() == {
+        "badge-1": {"path": get_badge_path("badge-1", "sharded"), "message": "three"},
+        "badge-2": {"path": get_badge_path("badge-2", "sharded"), "message": "two"},
+    }
+
+
+def test_update_badge_index_rebuild_corrupt(tmp_path, monkeypatch):
+    """
+    Test add/update badge entries in a corrupt shard index
+
+    Expect Result: index rebuilt from the badge files in its shard folder (no entries dropped)
+    """
+    monkeypatch.chdir(tmp_path)
+    badge_dict = create_badge_dict("flat", "demo", "000", "one", "FFF")
+    other = "badge-1129"
+    assert get_badge_index_path(other) == get_badge_index_path("badge-1")
+    create_badge_json(badge_dict, other, "sharded")
+    (tmp_path / get_badge_index_path(other)).write_text("{corrupt")
+
+    assert update_badge_index(badge_dict, "badge-1", "sharded") is True
+    assert set(read_badge_index()) == {"badge-1", other}
+
+
+def test_read_badge_index_skip_invalid(tmp_path, monkeypatch):
+    """
+    Test read shard indexes that are not JSON objects
+
+    Expect Result: invalid shard indexes skipped, valid entries kept
+    """
+    monkeypatch.chdir(tmp_path)
+    assert update_badge_index(create_badge_dict("flat", "demo", "000", "one", "FFF"), "badge-1", "sharded") is True
+    for shard, content in [("00", "[1]"), ("01", "5")]:
+        (tmp_path / "badges" / shard).mkdir()
+        (tmp_path / "badges" / shard / "index.json").write_text(content)
+
+    assert set(read_badge_index()) == {"badge-1"}
+
+
+def test_update_badge_index_return_false():
+    """
+    Test add/update badge entries in shard indexes
+
+    Expect Result: False due to invalid badge_dict or flat layout
+    """
+    assert update_badge_index("", "ci-testing", "sharded") is False  # type: ignore
+    assert update_badge_index(create_badge_dict("flat", "demo", "000", "one", "FFF"), "ci-testing", "flat") is False
+
+
+def test_check_badge_name_return_false_reserved_name(tmp_path):
+    """
+    Test badge name validation (sharded layout)
+
+    Expect Result: index rejected in the sharded layout only, and nothing published under the shard index path
+    """
+    badges = {"index": create_badge_dict("flat", "demo", "000", "one", "FFF")}
+
+    assert check_badge_name("index") is True
+    assert check_badge_name("index", "sharded") is False
+    assert publish_changes("filesystem", badges, "ci-testing", "sharded", "", publish_dir=str(tmp_path)) is None
+    assert not (tmp_path / "badges").exists()
+
+
+def test_push_changes_sharded_touch_changed_shards(bare_remote, tmp_path, monkeypatch):
+    """
+    Test push changes in the sharded layout
+
+    Expect Result: commit only touches the shard folders of changed badges
+    """
+    remote_path = bare_remote
+    repo = git.Repo.clone_from(remote_path, tmp_path / "clone", branch="ci-testing")
+    monkeypatch.chdir(repo.working_dir)
+
+    for badge_name in ["badge-1", "badge-2"]:
+        badge_dict = create_badge_dict("flat", "demo", "000", "one", "FFF")
+        create_badge_json(badge_dict, badge_name, "sharded")
+        update_badge_index(badge_dict, badge_name, "sharded")
+    assert push_changes(repo, "origin", "ci-testing", ["badge-1", "badge-2"], "", "sharded") is not None
+
+    badge_dict = create_badge_dict("flat", "demo", "000", "two", "FFF")
+    create_badge_json(badge_dict, "badge-1", "sharded")
+    update_badge_index(badge_dict, "badge-1", "sharded")
+    assert check_badge_changes(repo, "badge-1", "sharded") is True
+    assert push_changes(repo, "origin", "ci-testing", "badge-1", "", "sharded") is not None
+
+    changed = sorted(repo.git.diff_tree("--no-commit-id", "--name-only", "-r", "HEAD").splitlines())
+    assert changed == sorted([get_badge_path("badge-1", "sharded"), get_badge_index_path("badge-1")])
+
+
 def test_push_changes_return_none_01(get_repo):
     """
     Test push changes to remote
@@ -321,6 +564,61 @@ def test_push_changes_return_none_02(get_repo):
     assert push_changes(get_repo, remote_name, badge_branch, badge_name, msg_suffix) is None
 
 
+def test_push_changes_retry_on_rejection(bare_remote, tmp_path, monkeypatch):
+    """
+    Test push changes to remote after a concurrent publisher pushed first
+
+    Expect Result: None without retries, merge commit hash with a pull and push retry
+    """
+    remote_path = bare_remote
+    clones = [git.Repo.clone_from(remote_path, tmp_path / name, branch="ci-testing") for name in ["first", "second"]]
+    for clone in clones:
+        with clone.config_writer() as writer:
+            writer.set_value("user", "name", "Mona Lisa")
+            writer.set_value("user", "email", "mona.lisa@github.com")
+        with open(os.path.join(clone.working_dir, "badges", f"{os.path.basename(clone.working_dir)}.json"), "w") as file:
+            file.write("{}\n")
+
+    monkeypatch.chdir(clones[0].working_dir)
+    assert push_changes(clones[0], "origin", "ci-testing", "first", "") is not None
+    monkeypatch.chdir(clones[1].working_dir)
+    push_stats = {}
+    assert push_changes(clones[1], "origin", "ci-testing", "second", "", push_stats=push_stats) is None
+    commit_hash = push_changes(clones[1], "origin", "ci-testing", [], "", max_retries=1, push_stats=push_stats)
+
+    assert commit_hash == git.Repo(remote_path).commit("ci-testing").hexsha
+    assert len(git.Repo(remote_path).commit("ci-testing").parents) == 2
+    assert push_stats == {"push_attempts": 3, "rejections": 2}
+
+
+def test_push_changes_resolve_shard_index_conflict(bare_remote, tmp_path, monkeypatch):
+    """
+    Test push changes from two clones that add badges to the same shard (sharded layout)
+
+    Expect Result: conflicting shard index rebuilt on retry, both badges in the remote index
+    """
+    remote_path = bare_remote
+    badge_names = ["writer-133", "writer-172"]
+    assert get_badge_index_path(badge_names[0]) == get_badge_index_path(badge_names[1])
+
+    clones = [git.Repo.clone_from(remote_path, tmp_path / name, branch="ci-testing") for name in badge_names]
+    for clone, badge_name in zip(clones, badge_names):
+        with clone.config_writer() as writer:
+            writer.set_value("user", "name", "Mona Lisa")
+            writer.set_value("user", "email", "mona.lisa@github.com")
+        monkeypatch.chdir(clone.working_dir)
+        badge_dict = create_badge_dict("flat", "demo", "000", badge_name, "FFF")
+        create_badge_json(badge_dict, badge_name, "sharded")
+        update_badge_index(badge_dict, badge_name, "sharded")
+        assert push_changes(clone, "origin", "ci-testing", badge_name, "", "sharded", max_retries=1) is not None
+
+    head = git.Repo(remote_path).commit("ci-testing")
+    badge_index = json.loads((head.tree / get_badge_index_path(badge_names[0])).data_stream.read())
+    assert {badge_name: entry["message"] for badge_name, entry in badge_index.items()} == {
+        badge_name: badge_name for badge_name in badge_names
+    }
+
+
 def test_create_shieldsio_endpoint_return_true_01(get_repo):
     """
     Test create shields.io endpoint badge url
@@ -355,6 +653,21 @@ def test_create_shieldsio_endpoint_return_true_02(get_repo):
     assert "https://img.shields.io/endpoint" in endpoint_badge, "Return value must contain shields.io endpoint"
 
 
+def test_create_shieldsio_endpoint_return_true_sharded(get_repo):
+    """
+    Test create shields.io endpoint badge url (sharded layout)
+
+    Expect Result: Endpoint Badge pointing to the sharded json file
+    """
+    badge_name = "demo"
+    branch_name = "demo"
+    badge_url = ""
+
+    endpoint_badge = create_shieldsio_endpoint_badge(get_repo, branch_name, badge_name, badge_url, "sharded")
+
+    assert f"/refs/heads/{branch_name}/{get_badge_path(badge_name, 'sharded')})" in endpoint_badge
+
+
 def test_main_return_failure_01():
     """
     Test main
@@ -426,5 +739,617 @@ def test_main_return_success_no_changes():
     assert result is not None
 
 
+def test_create_badge_bundle_return_path(tmp_path):
+    """
+    Test create badge bundle from python dictionary
+
+    Expect Result: bundle path that reads back as a verified bundle
+    """
+    badge_dict = create_badge_dict("flat", "demo", "000", "no status", "FFF")
+
+    result = create_badge_bundle(badge_dict, "ci-testing", "", str(tmp_path))
+    print(f"\nCreate badge bundle result: {result}")
+
+    assert result is not None
+    bundles = read_badge_bundles([result])
+    assert len(bundles) == 1
+    assert bundles[0]["badgeName"] == "ci-testing"
+    assert bundles[0]["badge"] == badge_dict
+
+
+def test_create_badge_bundle_return_none(tmp_path):
+    """
+    Test create badge bundle from python dictionary
+
+    Expect Result: None due to invalid badge_dict
+    """
+    assert create_badge_bundle("", "ci-testing", "", str(tmp_path)) is None  # type: ignore
+
+
+def test_read_badge_bundles_skip_tampered(tmp_path):
+    """
+    Test read badge bundles
+
+    Expect Result: tampered bundle is skipped
+    """
+    badge_dict = create_badge_dict("flat", "demo", "000", "no status", "FFF")
+    bundle_file = create_badge_bundle(badge_dict, "ci-testing", "", str(tmp_path))
+    with open(bundle_file, "r") as file:  # type: ignore
+        content = file.read()
+    with open(bundle_file, "w") as file:  # type: ignore
+        file.write(content.replace("no status", "passing"))
+
+    assert read_badge_bundles([str(tmp_path)]) == []
+
+
+@pytest.mark.parametrize(
+    "field, value",
+    [
+        ("labelColor", 123),
+        ("color", None),
+        ("timestamp", "yesterday"),
+        ("badgeName", "../../etc/badge"),
+        ("badgeName", ".."),
+        ("badgeName", "shard/badge"),
+    ],
+)
+def test_read_badge_bundles_skip_invalid_fields(tmp_path, field, value):
+    """
+    Test read badge bundles with a valid hash but invalid field types or unsafe badge name
+
+    Expect Result: bundle is skipped (no exception)
+    """
+    bundle = {
+        "bundleVersion": 1,
+        "badgeName": "ci-testing",
+        "badgeUrl": "",
+        "timestamp": 1.0,
+        "badge": create_badge_dict("flat", "demo", "000", "no status", "FFF"),
+    }
+    if field in bundle:
+        bundle[field] = value
+    else:
+        bundle["badge"][field] = value
+    content = json.dumps(bundle, separators=(",", ":"), sort_keys=True)
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    (tmp_path / f"ci-testing.{content_hash}.json").write_text(content + "\n")
+
+    assert read_badge_bundles([str(tmp_path)]) == []
+
+
+def test_merge_badge_bundles_return_latest(tmp_path):
+    """
+    Test merge badge bundles
+
+    Expect Result: latest bundle per badge name
+    """
+    create_badge_bundle(create_badge_dict("flat", "demo", "000", "old", "FFF"), "badge-1", "", str(tmp_path))
+    create_badge_bundle(create_badge_dict("flat", "demo", "000", "other", "FFF"), "badge-2", "", str(tmp_path))
+    create_badge_bundle(create_badge_dict("flat", "demo", "000", "new", "FFF"), "badge-1", "", str(tmp_path))
+
+    result = merge_badge_bundles(read_badge_bundles([str(tmp_path)]))
+    print(f"\nMerge badge bundles result: {result}")
+
+    assert list(result) == ["badge-1", "badge-2"]
+    assert result["badge-1"]["badge"]["message"] == "new"
+
+
+def test_main_generate_and_publish(bare_remote, tmp_path, monkeypatch):
+    """
+    Test main generate and publish stages against a local bare remote
+
+    Expect Result: badges from every bundle pushed in one commit
+    """
+    remote_path = bare_remote
+    clone = git.Repo.clone_from(remote_path, tmp_path / "clone")
+    monkeypatch.chdir(clone.working_dir)
+
+    runner = CliRunner()
+    for badge_name, message in [("badge-1", "one"), ("badge-2", "two")]:
+        result = runner.invoke(
+            main, ["generate", "--badge-name", badge_name, "--message", message, "--bundle-dir", str(tmp_path / "bundles")]
+        )
+        assert result.exit_code == 0
+
+    result = runner.invoke(main, ["publish", str(tmp_path / "bundles"), "--badge-branch", "ci-testing"])
+    print(f"\nMain result: {result.output}")
+
+    assert result.exit_code == 0
+    head = git.Repo(remote_path).commit("ci-testing")
+    assert len(head.parents) == 1
+    assert {blob.path for blob in head.tree["badges"].blobs} >= {"badges/badge-1.json", "badges/badge-2.json"}
+    assert result.output.count("🎉 Endpoint Badge") == 2
+
+
+def test_main_generate_and_publish_skip_reserved_name(bare_remote, tmp_path, monkeypatch):
+    """
+    Test main generate and publish stages with a reserved badge name bundle (sharded layout)
+
+    Expect Result: reserved name bundle skipped, other badges pushed with a valid shard index
+    """
+    clone = git.Repo.clone_from(bare_remote, tmp_path / "clone")
+    monkeypatch.chdir(clone.working_dir)
+
+    runner = CliRunner()
+    for badge_name in ["index", "badge-1"]:
+        result = runner.invoke(main, ["generate", "--badge-name", badge_name, "--bundle-dir", str(tmp_path / "bundles")])
+        assert result.exit_code == 0
+
+    result = runner.invoke(
+        main, ["publish", str(tmp_path / "bundles"), "--badge-branch", "ci-testing", "--badge-layout", "sharded"]
+    )
+    print(f"\nMain result: {result.output}")
+
+    assert "badge name (index) is reserved in the sharded layout" in result.output
+    head = git.Repo(bare_remote).commit("ci-testing")
+    badge_index = json.loads((head.tree / get_badge_index_path("badge-1")).data_stream.read())
+    assert list(badge_index) == ["badge-1"]
+    assert result.output.count("🎉 Endpoint Badge") == 1
+
+
+def test_main_commands_share_options():
+    """
+    Test options shared by main and its generate/publish commands
+
+    Expect Result: same option names and defaults in every command
+    """
+    main_options = {param.name: param.default for param in main.params if param.name != "version"}
+    generate_options = {param.name: param.default for param in main.commands["generate"].params}
+    publish_options = {param.name: param.default for param in main.commands["publish"].params}
+    del generate_options["bundle_dir"], publish_options["bundle_paths"]
+
+    assert generate_options == {name: main_options[name] for name in generate_options}
+    assert publish_options == {name: main_options[name] for name in publish_options}
+    assert set(generate_options) | set(publish_options) == set(main_options)
+
+
+def test_main_return_usage_error_group_options_before_command(tmp_path):
+    """
+    Test main with one-shot options before the publish command
+
+    Expect Result: usage error instead of silently ignoring the options
+    """
+    runner = CliRunner()
+    result = runner.invoke(main, ["--badge-branch", "foo", "--publisher", "filesystem", "publish", str(tmp_path)])
+    print(f"\nMain result: {result.output}")
+
+    assert result.exit_code == 2
+    assert "--badge-branch, --publisher cannot be used before the 'publish' command" in result.output
+
+
+def test_main_generate_return_failure_invalid_badge_name(tmp_path):
+    """
+    Test main generate
+
+    Expect Result: no bundle due to unsafe badge name
+    """
+    runner = CliRunner()
+    result = runner.invoke(main, ["generate", "--badge-name", "../badge", "--bundle-dir", str(tmp_path)])
+
+    assert result.exit_code == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_check_publisher_inputs():
+    """
+    Test publisher input validations
+
+    Expect Result: True for complete inputs, False for missing or invalid inputs
+    """
+    assert check_publisher_inputs("git", "", "", "", "") is True
+    assert check_publisher_inputs("contents-api", "https://api.github.com", "tagdots/setup-badge", "", "") is True
+    assert check_publisher_inputs("contents-api", "https://api.github.com", "setup-badge", "", "") is False
+    assert check_publisher_inputs("filesystem", "", "", "public", "https://badges.example.com") is True
+    assert check_publisher_inputs("filesystem", "", "", "public", "") is False
+    assert check_publisher_inputs("s3", "", "", "", "") is False
+
+
+def test_put_contents_api_retry_on_conflict(contents_api):
+    """
+    Test put a file with the contents API when a concurrent update rejects the first PUT
+
+    Expect Result: commit hash after retrying with the latest SHA, None when up to date
+    """
+    api_url, files, state = contents_api
+    state["conflicts"] = 1
+
+    result = put_contents_api(api_url, "owner/repo", "token", "ci-testing", "badges/ci-testing.json", b"{}\n", "msg")
+    print(f"\nPut contents API result: {result}")
+
+    assert result is not None
+    assert files["badges/ci-testing.json"] == b"{}\n"
+    assert put_contents_api(api_url, "owner/repo", "token", "ci-testing", "badges/ci-testing.json", b"{}\n", "msg") is None
+
+
+def test_publish_changes_contents_api_sharded(contents_api):
+    """
+    Test publish badges with the contents-api publisher (sharded layout)
+
+    Expect Result: badge files and index created, nothing changed on the second run
+    """
+    api_url, files, state = contents_api
+    badges = {
+        "badge-1": create_badge_dict("flat", "demo", "000", "one", "FFF"),
+        "badge-2": create_badge_dict("flat", "demo", "000", "two", "FFF"),
+    }
+
+    result = publish_changes(
+        "contents-api", badges, "ci-testing", "sharded", "", api_url=api_url, api_repo="owner/repo", api_token="token"
+    )
+    print(f"\nPublish changes result: {result}")
+
+    assert result is not None and len(result) == 4
+    assert json.loads(files[get_badge_path("badge-1", "sharded")]) == badges["badge-1"]
+    assert json.loads(files[get_badge_index_path("badge-2")])["badge-2"]["message"] == "two"
+    result = publish_changes(
+        "contents-api", badges, "ci-testing", "sharded", "", api_url=api_url, api_repo="owner/repo", api_token="token"
+    )
+    assert result == []
+    assert state["puts"] == 4
+
+
+def test_publish_changes_contents_api_merge_concurrent_index(contents_api):
+    """
+    Test publish a sharded badge while another publisher updates the same shard index
+
+    Expect Result: conflicting PUT retried with the index merged again, both index entries kept
+    """
+    api_url, files, state = contents_api
+    index_file = get_badge_index_path("badge-1")
+    assert get_badge_index_path("badge-1129") == index_file
+    files[index_file] = b"{}\n"
+
+    def add_concurrent_entry(files):
+        files[index_file] = json.dumps({"badge-1129": {"path": "other", "message": "other"}}).encode("utf-8")
+
+    state["before_put"][index_file] = add_concurrent_entry
+    badges = {"badge-1": create_badge_dict("flat", "demo", "000", "one", "FFF")}
+
+    result = publish_changes(
+        "contents-api", badges, "ci-testing", "sharded", "", api_url=api_url, api_repo="owner/repo", api_token="token"
+    )
+    print(f"\nPublish changes result: {result}")
+
+    assert result is not None and len(result) == 2
+    assert not state["before_put"]
+    badge_index = json.loads(files[index_file])
+    assert badge_index["badge-1"]["message"] == "one"
+    assert badge_index["badge-1129"]["message"] == "other"
+
+
+def test_publish_changes_contents_api_escape_path(contents_api):
+    """
+    Test publish a badge whose name needs URL escaping with the contents-api publisher
+
+    Expect Result: badge file stored under its unescaped name
+    """
+    api_url, files, _ = contents_api
+    badges = {"ci #1 status": create_badge_dict("flat", "demo", "000", "one", "FFF")}
+
+    result = publish_changes(
+        "contents-api", badges, "ci-testing", "flat", "", api_url=api_url, api_repo="owner/repo", api_token="token"
+    )
+    print(f"\nPublish changes result: {result}")
+
+    assert result is not None and len(result) == 1
+    assert json.loads(files["badges/ci #1 status.json"]) == badges["ci #1 status"]
+
+
+def test_publish_changes_git(bare_remote, tmp_path, monkeypatch):
+    """
+    Test publish badges with the git publisher against a local bare remote
+
+    Expect Result: badge files pushed in one commit, nothing changed on the second run
+    """
+    remote_path = bare_remote
+    repo = git.Repo.clone_from(remote_path, tmp_path / "clone")
+    monkeypatch.chdir(repo.working_dir)
+    badges = {
+        "badge-1": create_badge_dict("flat", "demo", "000", "one", "FFF"),
+        "badge-2": create_badge_dict("flat", "demo", "000", "two", "FFF"),
+    }
+
+    result = publish_changes("git", badges, "ci-testing", "sharded", "", repo=repo)
+    print(f"\nPublish changes result: {result}")
+
+    head = git.Repo(remote_path).commit("ci-testing")
+    assert result is not None and len(result) == 2
+    assert all(change.endswith(f"({head.hexsha[:7]})") for change in result)
+    assert publish_changes("git", badges, "ci-testing", "sharded", "", repo=repo) == []
+
+
+def test_publish_changes_git_report_changed_badges(bare_remote, tmp_path, monkeypatch):
+    """
+    Test publish badges in one shard with the git publisher, changing only one of them (sharded layout)
+
+    Expect Result: only the changed badge reported, its shard index committed with it; an index-only change reported
+    """
+    remote_path = bare_remote
+    repo = git.Repo.clone_from(remote_path, tmp_path / "clone")
+    monkeypatch.chdir(repo.working_dir)
+    assert get_badge_index_path("writer-0") == get_badge_index_path("writer-133")
+    badges = {
+        "writer-0": create_badge_dict("flat", "demo", "000", "one", "FFF"),
+        "writer-133": create_badge_dict("flat", "demo", "000", "one", "FFF"),
+    }
+    assert publish_changes("git", badges, "ci-testing", "sharded", "", repo=repo) is not None
+
+    badges["writer-0"] = create_badge_dict("flat", "demo", "000", "two", "FFF")
+    result = publish_changes("git", badges, "ci-testing", "sharded", "", repo=repo)
+    print(f"\nPublish changes result: {result}")
+
+    head = git.Repo(remote_path).commit("ci-testing")
+    assert result == [f"{get_badge_path('writer-0', 'sharded')} ({head.hexsha[:7]})"]
+    changed = sorted(repo.git.diff_tree("--no-commit-id", "--name-only", "-r", "HEAD").splitlines())
+    assert changed == sorted([get_badge_path("writer-0", "sharded"), get_badge_index_path("writer-0")])
+
+    (tmp_path / "clone" / get_badge_index_path("writer-0")).write_text("{corrupt")
+    repo.index.add([get_badge_index_path("writer-0")])
+    repo.index.commit("corrupt index")
+    repo.git.push("origin", "ci-testing")
+    result = publish_changes("git", badges, "ci-testing", "sharded", "", repo=repo)
+    print(f"\nPublish changes result: {result}")
+
+    head = git.Repo(remote_path).commit("ci-testing")
+    assert result == [f"{get_badge_index_path('writer-0')} ({head.hexsha[:7]})"]
+
+
+def test_publish_changes_filesystem(tmp_path):
+    """
+    Test publish badges with the filesystem publisher
+
+    Expect Result: badge file written, nothing changed on the second run
+    """
+    badges = {"ci-testing": create_badge_dict("flat", "demo", "000", "no status", "FFF")}
+
+    result = publish_changes("filesystem", badges, "ci-testing", "flat", "", publish_dir=str(tmp_path))
+    print(f"\nPublish changes result: {result}")
+
+    assert result == ["badges/ci-testing.json"]
+    with open(tmp_path / "badges" / "ci-testing.json") as json_file:
+        assert json.load(json_file) == badges["ci-testing"]
+    assert publish_changes("filesystem", badges, "ci-testing", "flat", "", publish_dir=str(tmp_path)) == []
+
+
+def test_publish_changes_return_none():
+    """
+    Test publish badges with an unknown publisher, or with the git publisher without a repo
+
+    Expect Result: None
+    """
+    badges = {"ci-testing": create_badge_dict("flat", "demo", "000", "no status", "FFF")}
+
+    assert publish_changes("s3", badges, "ci-testing", "flat", "") is None
+    assert publish_changes("git", badges, "ci-testing", "flat", "") is None
+
+
+def test_create_shieldsio_endpoint_raise_without_repo():
+    """
+    Test create shields.io endpoint badge url without a repo or a json base url
+
+    Expect Result: ValueError
+    """
+    with pytest.raises(ValueError):
+        create_shieldsio_endpoint_badge(None, "ci-testing", "ci-testing", "")
+
+
+def test_main_return_failure_reserved_name(tmp_path):
+    """
+    Test main with a reserved badge name (sharded layout)
+
+    Expect Result: inputs failed validations, nothing published
+    """
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        [
+            "--badge-name",
+            "index",
+            "--badge-layout",
+            "sharded",
+            "--publisher",
+            "filesystem",
+            "--publish-dir",
+            str(tmp_path),
+            "--public-url",
+            "https://badges.example.com",
+        ],
+    )
+    print(f"\nMain result: {result.output}")
+
+    assert "one or more of your inputs failed validations" in result.output
+    assert not (tmp_path / "badges").exists()
+
+
+def test_main_publisher_filesystem(tmp_path):
+    """
+    Test main with the filesystem publisher (no git access)
+
+    Expect Result: Endpoint Badge pointing to the public url
+    """
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        [
+            "--badge-name",
+            "ci-testing",
+            "--publisher",
+            "filesystem",
+            "--publish-dir",
+            str(tmp_path),
+            "--public-url",
+            "https://badges.example.com",
+        ],
+    )
+    print(f"\nMain result: {result.output}")
+
+    assert result.exit_code == 0
+    assert (tmp_path / "badges" / "ci-testing.json").is_file()
+    assert "?url=https://badges.example.com/badges/ci-testing.json)" in result.output
+
+
+def test_main_publisher_contents_api(contents_api):
+    """
+    Test main with the contents-api publisher (no clone or fetch)
+
+    Expect Result: Endpoint Badge pointing to raw.githubusercontent.com of api-repo
+    """
+    api_url, files, state = contents_api
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        ["--badge-name", "ci-testing", "--publisher", "contents-api", "--api-url", api_url, "--api-repo", "owner/repo"],
+    )
+    print(f"\nMain result: {result.output}")
+
+    assert result.exit_code == 0
+    assert "badges/ci-testing.json" in files
+    assert "raw.githubusercontent.com/owner/repo/refs/heads/badges/badges/ci-testing.json" in result.output
+
+
+def test_attach_object_cache_reuse_objects(bare_remote, tmp_path):
+    """
+    Test attach shared object cache to fresh clones of the same remote
+
+    Expect Result: second clone fetches the badge branch from the mirror without transferring objects
+    """
+    remote_path = bare_remote
+    object_cache = str(tmp_path / "cache")
+
+    # file:// clones transfer objects like a network remote (a plain path clone hardlinks them)
+    first = git.Repo.clone_from(f"file://{remote_path}", tmp_path / "first")
+    use_lock = attach_object_cache(first, "origin", object_cache)
+    assert use_lock is not None
+    first.git.checkout("ci-testing")
+    (tmp_path / "first" / "badges" / "ci-testing.json").write_text("{}\n")
+    first.index.add(["badges/ci-testing.json"])
+    first.index.commit("add badge")
+    first.git.push("origin", "ci-testing")
+    first.remote("origin").fetch()
+    assert close_object_cache(first, "origin", object_cache, 1024, use_lock) is True
+
+    mirror = git.Repo(get_object_cache_mirror(object_cache, f"file://{remote_path}"))
+    assert mirror.commit("ci-testing").hexsha == first.commit("ci-testing").hexsha
+
+    second = git.Repo.clone_from(f"file://{remote_path}", tmp_path / "second", single_branch=True, branch="main")
+    use_lock = attach_object_cache(second, "origin", object_cache)
+    before = second.git.count_objects("-v")
+    second.git.fetch("origin", "+refs/heads/ci-testing:refs/remotes/origin/ci-testing")
+    print(f"\nCount objects before: {before}\nCount objects after: {second.git.count_objects('-v')}")
+
+    assert second.git.count_objects("-v") == before
+    assert second.commit("origin/ci-testing").hexsha == first.commit("ci-testing").hexsha
+    assert close_object_cache(second, "origin", object_cache, 1024, use_lock) is True
+
+
+def test_close_object_cache_dissociate_before_prune(bare_remote, tmp_path):
+    """
+    Test close shared object cache with a size limit that prunes the repo's own mirror
+
+    Expect Result: mirror removed, and the repo still reads every object without its alternate
+    """
+    remote_path = bare_remote
+    object_cache = str(tmp_path / "cache")
+    first = git.Repo.clone_from(f"file://{remote_path}", tmp_path / "first")
+    use_lock = attach_object_cache(first, "origin", object_cache)
+    assert close_object_cache(first, "origin", object_cache, 1024, use_lock) is True
+
+    repo = git.Repo.clone_from(f"file://{remote_path}", tmp_path / "repo", single_branch=True, branch="main")
+    use_lock = attach_object_cache(repo, "origin", object_cache)
+    repo.git.fetch("origin", "+refs/heads/ci-testing:refs/remotes/origin/ci-testing")
+    assert close_object_cache(repo, "origin", object_cache, 0, use_lock) is True
+
+    assert not os.path.isdir(get_object_cache_mirror(object_cache, f"file://{remote_path}"))
+    assert not os.path.exists(os.path.join(repo.git_dir, "objects", "info", "alternates"))
+    assert repo.git.show("origin/ci-testing:badges/README.md") == "## Badges"
+    repo.git.fsck("--full")
+
+
+def test_close_object_cache_dissociate_on_refresh_failure(bare_remote, tmp_path):
+    """
+    Test close shared object cache when the mirror refresh fails
+
+    Expect Result: False, repo still dissociated before its mirror is released, and readable after prune
+    """
+    object_cache = str(tmp_path / "cache")
+    first = git.Repo.clone_from(f"file://{bare_remote}", tmp_path / "first")
+    use_lock = attach_object_cache(first, "origin", object_cache)
+    assert use_lock is not None
+    assert close_object_cache(first, "origin", object_cache, 1024, use_lock) is True
+
+    repo = git.Repo.clone_from(f"file://{bare_remote}", tmp_path / "repo", single_branch=True, branch="main")
+    use_lock = attach_object_cache(repo, "origin", object_cache)
+    assert use_lock is not None
+    repo.git.fetch("origin", "+refs/heads/ci-testing:refs/remotes/origin/ci-testing")
+    mirror = get_object_cache_mirror(object_cache, f"file://{bare_remote}")
+    os.remove(os.path.join(mirror, "HEAD"))  # the mirror is no longer a git repo, so its fetch fails
+
+    assert close_object_cache(repo, "origin", object_cache, 1024, use_lock) is False
+    assert not os.path.exists(os.path.join(repo.git_dir, "objects", "info", "alternates"))
+
+    assert prune_object_cache(object_cache, 0) == [mirror]
+    assert repo.git.show("origin/ci-testing:badges/README.md") == "## Badges"
+    repo.git.fsck("--full")
+
+
+def test_attach_object_cache_return_none(get_repo, tmp_path):
+    """
+    Test attach shared object cache
+
+    Expect Result: None due to invalid remote name
+    """
+    assert attach_object_cache(get_repo, "origin-invalid", str(tmp_path)) is None
+
+
+def test_prune_object_cache_remove_lru(tmp_path):
+    """
+    Test prune shared object cache
+
+    Expect Result: least recently used mirrors removed until the cache fits, mirror in use kept
+    """
+    for index, name in enumerate(["old", "in-use", "new"]):
+        mirror = tmp_path / f"{name}.git"
+        mirror.mkdir()
+        (mirror / "pack").write_bytes(b"0" * 1024 * 1024)
+        os.utime(mirror, (index, index))
+
+    use_lock = lock_object_cache(str(tmp_path / "in-use.git.use"), exclusive=False)
+    assert prune_object_cache(str(tmp_path), 2) == [str(tmp_path / "old.git")]
+    assert (tmp_path / "new.git").is_dir()
+
+    result = prune_object_cache(str(tmp_path), 0)
+    print(f"\nPrune object cache result: {result}")
+    use_lock.close()  # type: ignore
+
+    assert result == [str(tmp_path / "new.git")]
+    assert (tmp_path / "in-use.git").is_dir()
+
+
+def test_prune_object_cache_skip_removed_files(tmp_path, monkeypatch):
+    """
+    Test prune shared object cache while a concurrent job removes mirror files
+
+    Expect Result: vanished files skipped without FileNotFoundError, remaining mirror removed
+    """
+    for name in ["gone", "kept"]:
+        mirror = tmp_path / f"{name}.git"
+        mirror.mkdir()
+        (mirror / "pack").write_bytes(b"0" * 1024)
+
+    walk = os.walk
+
+    def walk_then_remove(path, *args, **kwargs):
+        for root, dirs, files in walk(path, *args, **kwargs):
+            if os.path.basename(path) == "gone.git" and os.path.exists(os.path.join(root, "pack")):
+                os.remove(os.path.join(root, "pack"))
+            yield root, dirs, files
+
+    monkeypatch.setattr(os, "walk", walk_then_remove)
+    result = prune_object_cache(str(tmp_path), 0)
+    print(f"\nPrune object cache result: {result}")
+
+    assert sorted(result) == [str(tmp_path / "gone.git"), str(tmp_path / "kept.git")]
+
+
 if __name__ == "__main__":
     pytest.main()
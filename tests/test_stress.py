@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+
+"""
+Purpose: tests
+"""
+
+import json
+import threading
+
+from click.testing import CliRunner
+
+from setup_badge.cli import get_badge_index_path
+from setup_badge.stress import (
+    count_lost_updates,
+    create_bare_remote,
+    get_writer_badge_name,
+    main,
+    percentile,
+    run_writer,
+    summarize,
+)
+
+
+def test_percentile_return_nearest_rank():
+    """
+    Test nearest-rank percentile
+
+    Expect Result: value at the nearest rank, 0.0 for no values
+    """
+    values = [5, 1, 4, 2, 3]
+
+    assert percentile(values, 50) == 3
+    assert percentile(values, 99) == 5
+    assert percentile(values, 1) == 1
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize_return_report():
+    """
+    Test summarize writer statistics
+
+    Expect Result: throughput, rejection rate and lost updates in report
+    """
+    writer_stats = [
+        {"latencies": [0.1, 0.2], "successes": 2, "failures": 0, "push_attempts": 3, "rejections": 1},
+        {"latencies": [0.3], "successes": 1, "failures": 1, "push_attempts": 3, "rejections": 2},
+    ]
+
+    report = summarize(writer_stats, 1.5, 0)
+    print(f"\nSummarize result: {report}")
+
+    assert report["successes"] == 3
+    assert report["throughput"] == 2.0
+    assert report["rejection_rate"] == 0.5
+    assert report["latency_p50"] == 0.2
+    assert report["lost_updates"] == 0
+
+
+def test_run_writer_return_stats(tmp_path):
+    """
+    Test one writer against a local bare remote
+
+    Expect Result: every update acknowledged and none lost
+    """
+    remote_path = create_bare_remote(str(tmp_path), "ci-testing")
+
+    stats = run_writer(remote_path, str(tmp_path), 0, 2, "ci-testing", 0)
+    print(f"\nRun writer result: {stats}")
+
+    assert stats["successes"] == 2
+    assert stats["rejections"] == 0
+    assert count_lost_updates(remote_path, "ci-testing", [stats]) == 0
+
+
+def test_run_writer_sharded_return_stats(tmp_path):
+    """
+    Test one writer against a local bare remote (sharded layout)
+
+    Expect Result: every update acknowledged and none lost (badge files and shard index)
+    """
+    remote_path = create_bare_remote(str(tmp_path), "ci-testing")
+
+    stats = run_writer(remote_path, str(tmp_path), 0, 2, "ci-testing", 0, None, "sharded")
+    print(f"\nRun writer result: {stats}")
+
+    assert stats["successes"] == 2
+    assert count_lost_updates(remote_path, "ci-testing", [stats], "sharded") == 0
+
+
+def test_get_writer_badge_name_same_shard():
+    """
+    Test writer badge names
+
+    Expect Result: writer-<id> by default, one shard index for every writer with same_shard
+    """
+    assert get_writer_badge_name(3) == "writer-3"
+    assert {get_badge_index_path(get_writer_badge_name(writer_id, True)) for writer_id in range(4)} == {
+        get_badge_index_path("writer-0")
+    }
+
+
+def test_main_same_shard_return_report(tmp_path):
+    """
+    Test stress test command with concurrent writers on one shard (sharded layout)
+
+    Expect Result: shard index conflicts resolved with no lost updates
+    """
+    report_json = tmp_path / "report.json"
+    runner = CliRunner()
+    result = runner.invoke(
+        main,
+        [
+            "--writers",
+            "2",
+            "--updates",
+            "2",
+            "--max-retries",
+            "3",
+            "--badge-layout",
+            "sharded",
+            "--same-shard",
+            "--report-json",
+            str(report_json),
+        ],
+    )
+    print(f"\nMain result: {result.output}")
+
+    assert result.exit_code == 0
+    with open(report_json) as json_file:
+        report = json.load(json_file)
+    assert report["lost_updates"] == 0
+
+
+def test_run_writer_abort_barrier(tmp_path):
+    """
+    Test a writer that fails before the start barrier
+
+    Expect Result: barrier aborted, so the other writer fails instead of waiting forever
+    """
+    barrier = threading.Barrier(2)
+
+    failed = run_writer(str(tmp_path / "no-remote.git"), str(tmp_path), 0, 2, "ci-testing", 0, barrier)
+    waiting = run_writer(create_bare_remote(str(tmp_path), "ci-testing"), str(tmp_path), 1, 2, "ci-testing", 0, barrier)
+
+    assert barrier.broken
+    assert failed["failures"] == 2 and waiting["failures"] == 2
+
+
+def test_count_lost_updates_return_lost(tmp_path):
+    """
+    Test count lost updates
+
+    Expect Result: 2 lost updates due to an unreachable commit and a stale badge message
+    """
+    remote_path = create_bare_remote(str(tmp_path), "ci-testing")
+    stats = run_writer(remote_path, str(tmp_path), 0, 1, "ci-testing", 0)
+    stats["commits"].append(["0" * 40, "0-1"])
+
+    assert count_lost_updates(remote_path, "ci-testing", [stats]) == 2
+
+
+def test_main_return_report(tmp_path):
+    """
+    Test stress test command with concurrent writers
+
+    Expect Result: report written with no lost updates
+    """
+    report_json = tmp_path / "report.json"
+    runner = CliRunner()
+    result = runner.invoke(main, ["--writers", "2", "--updates", "2", "--report-json", str(report_json)])
+    print(f"\nMain result: {result.output}")
+
+    assert result.exit_code == 0
+    with open(report_json) as json_file:
+        report = json.load(json_file)
+    assert report["writers"] == 2
+    assert report["successes"] + report["failures"] == 4
+    assert report["lost_updates"] == 0